@@ -81,33 +81,33 @@ class DatabaseManager:
     def guardar_factura(self, datos_factura: Dict[str, Any]) -> tuple[bool, str]:
         """Guarda una factura en la base de datos"""
         try:
-            # Verificar si el comprobante ya existe
-            if datos_factura.get('comprobante'):
-                existe = self.verificar_comprobante_existente(datos_factura['comprobante'])
-                if existe:
-                    return False, "El comprobante ya existe en la base de datos"
-            
-            # Insertar factura
-            self.cursor.execute('''
-                INSERT INTO facturas 
-                (rnc_emisor, nombre_emisor, comprobante, fecha_emision, 
-                 subtotal, impuestos, descuentos, total, archivo_origen, 
-                 fecha_procesamiento, confianza, estado_validacion)
-                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-            ''', (
-                datos_factura.get('rnc_emisor'),
-                datos_factura.get('nombre_emisor'),
-                datos_factura.get('comprobante'),
-                datos_factura.get('fecha_emision'),
-                datos_factura.get('subtotal'),
-                datos_factura.get('impuestos'),
-                datos_factura.get('descuentos'),
-                datos_factura.get('total'),
-                datos_factura.get('archivo_origen'),
-                datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
-                datos_factura.get('confianza', 0),
-                datos_factura.get('estado_validacion', 'PENDIENTE')
-            ))
+            # Insertar factura; la restricción UNIQUE de comprobante detecta los
+            # duplicados sin una consulta previa
+            try:
+                self.cursor.execute('''
+                    INSERT INTO facturas 
+                    (rnc_emisor, nombre_emisor, comprobante, fecha_emision, 
+                     subtotal, impuestos, descuentos, total, archivo_origen, 
+                     fecha_procesamiento, confianza, estado_validacion)
+                    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                ''', (
+                    datos_factura.get('rnc_emisor'),
+                    datos_factura.get('nombre_emisor'),
+                    datos_factura.get('comprobante'),
+                    datos_factura.get('fecha_emision'),
+                    datos_factura.get('subtotal'),
+                    datos_factura.get('impuestos'),
+                    datos_factura.get('descuentos'),
+                    datos_factura.get('total'),
+                    datos_factura.get('archivo_origen'),
+                    datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+                    datos_factura.get('confianza', 0),
+                    datos_factura.get('estado_validacion', 'PENDIENTE')
+                ))
+            except sqlite3.IntegrityError:
+                if not datos_factura.get('comprobante'):
+                    raise
+                return False, "El comprobante ya existe en la base de datos"
             
             # Actualizar proveedor si hay RNC y nombre
             if datos_factura.get('rnc_emisor') and datos_factura.get('nombre_emisor'):
@@ -1,9 +1,44 @@
 # ml/field_extractor_ml.py
 import re
+import logging
 import spacy
 from typing import Dict, List, Optional, Any, Tuple
 from collections import defaultdict
 
+logger = logging.getLogger(__name__)
+
+# Términos de contexto por tipo de monto, en orden de prioridad. Se buscan todos
+# en una sola pasada por línea; ningún término es prefijo de otro de distinto tipo.
+_AMOUNT_CONTEXT_TERMS = (
+    ('total', ('total', 'pagar', 'importe', 'final')),
+    ('subtotal', ('subtotal', 'gravado', 'base')),
+    ('itbis', ('itbis', 'impuesto', 'iva', 'tax')),
+)
+_AMOUNT_CONTEXT_BITS = {kind: 1 << bit for bit, (kind, _) in enumerate(_AMOUNT_CONTEXT_TERMS)}
+_AMOUNT_CONTEXT_RE = re.compile('(?=' + '|'.join(
+    f"(?P<{kind}>{'|'.join(map(re.escape, terms))})" for kind, terms in _AMOUNT_CONTEXT_TERMS
+) + ')')
+
+# Patrones de las heurísticas y del análisis de calidad, compilados una sola vez
+_RNC_RE = re.compile(r'\d{9,11}')
+# NCF estándar (grupo 1) o con guiones (grupo 2) en una sola búsqueda
+_NCF_STANDARD_RE = re.compile(r'[A-E]\d{10,11}')
+_NCF_RE = re.compile(r'([A-E]\d{10,11})|([A-Z]\d{2}-\d{2}-\d{4}-\d{2})')
+_AMOUNT_RE = re.compile(r'(\d{1,3}(?:[.,]\d{3})*[.,]\d{2})')
+_DATE_RE = re.compile(r'(\d{1,2}[-/]\d{1,2}[-/]\d{2,4})')
+_DECIMAL_RE = re.compile(r'\d+[.,]\d{2}')
+_DIGIT_RE = re.compile(r'\d')
+_IDENTIFIER_RE = re.compile(r'(RNC|NCF|NIT|ID)', re.IGNORECASE)
+
+
+def _context_mask(line_lower: str) -> int:
+    """Bits de los tipos de monto cuyos términos aparecen en la línea"""
+    mask = 0
+    for match in _AMOUNT_CONTEXT_RE.finditer(line_lower):
+        mask |= _AMOUNT_CONTEXT_BITS[match.lastgroup]
+    return mask
+
+
 class MLFieldExtractor:
     def __init__(self):
         self.nlp = None
@@ -29,10 +64,10 @@ class MLFieldExtractor:
     
     def extract_with_ml(self, text: str, invoice_type: str) -> Dict[str, Any]:
         """Extrae campos usando técnicas de ML/NLP"""
-        print(f"🧠 Aplicando ML avanzado para tipo: {invoice_type}")
+        logger.debug("Aplicando ML avanzado para tipo: %s", invoice_type)
         
         if self.nlp is None:
-            print("   ⚠️  spaCy no disponible, usando ML básico")
+            logger.debug("spaCy no disponible, usando ML básico")
             return self._extract_with_advanced_heuristics(text, invoice_type)
         
         try:
@@ -50,11 +85,11 @@ class MLFieldExtractor:
                 if value and str(value).strip():
                     cleaned_results[key] = value
             
-            print(f"📊 ML avanzado extrajo {len(cleaned_results)} campos: {list(cleaned_results.keys())}")
+            logger.debug("ML avanzado extrajo %d campos: %s", len(cleaned_results), list(cleaned_results))
             return cleaned_results
             
         except Exception as e:
-            print(f"❌ Error en ML avanzado: {e}. Usando ML básico.")
+            logger.warning("Error en ML avanzado: %s. Usando ML básico.", e)
             return self._extract_with_advanced_heuristics(text, invoice_type)
     
     def _extract_entities_spacy(self, doc) -> Dict[str, str]:
@@ -64,19 +99,19 @@ class MLFieldExtractor:
         for ent in doc.ents:
             if ent.label_ == "MONEY" and len(ent.text) > 3:
                 entities['monto_detectado'] = ent.text
-                print(f"   💰 spaCy detectó monto: {ent.text}")
+                logger.debug("spaCy detectó monto: %s", ent.text)
             elif ent.label_ == "DATE":
                 if 'fecha' not in entities:
                     entities['fecha_detectada'] = ent.text
-                    print(f"   📅 spaCy detectó fecha: {ent.text}")
+                    logger.debug("spaCy detectó fecha: %s", ent.text)
             elif ent.label_ == "ORG" and len(ent.text) > 3:
                 entities['empresa_detectada'] = ent.text
-                print(f"   🏢 spaCy detectó empresa: {ent.text}")
+                logger.debug("spaCy detectó empresa: %s", ent.text)
             elif ent.label_ == "CARDINAL" and len(ent.text) > 5:
                 # Podría ser un NIT/RNC
                 if ent.text.replace('-', '').replace('.', '').isdigit():
                     entities['numero_documento'] = ent.text
-                    print(f"   🔢 spaCy detectó documento: {ent.text}")
+                    logger.debug("spaCy detectó documento: %s", ent.text)
         
         return entities
     
@@ -106,72 +141,86 @@ class MLFieldExtractor:
         """Heurísticas avanzadas para extracción (sin spaCy)"""
         results = {}
         lines = text.split('\n')
-        text_lower = text.lower()
+        lines_lower = [line.lower() for line in lines]
+        line_masks = None
         
-        print("   🔍 Aplicando heurísticas avanzadas...")
+        logger.debug("Aplicando heurísticas avanzadas")
         
         # Análisis de líneas para encontrar patrones específicos
         for i, line in enumerate(lines):
             line_clean = line.strip()
+            line_lower = lines_lower[i]
+            context_mask = None
             
             # Detectar RNC con contexto mejorado
-            if 'rnc' in line.lower():
-                rnc_candidates = re.findall(r'\d{9,11}', line_clean)
-                if rnc_candidates:
-                    results['rnc'] = rnc_candidates[0]
-                    print(f"   🔍 RNC detectado: {rnc_candidates[0]}")
+            if 'rnc' in line_lower:
+                rnc_match = _RNC_RE.search(line_clean)
+                if rnc_match:
+                    results['rnc'] = rnc_match.group()
+                    logger.debug("RNC detectado: %s", rnc_match.group())
             
             # Detectar NCF con diferentes formatos
-            if 'ncf' in line.lower():
-                ncf_patterns = [
-                    r'[A-E]\d{10,11}',  # Formato estándar
-                    r'[A-Z]\d{2}-\d{2}-\d{4}-\d{2}'  # Formato con guiones
-                ]
-                for pattern in ncf_patterns:
-                    ncf_match = re.search(pattern, line_clean)
-                    if ncf_match:
-                        results['ncf'] = ncf_match.group()
-                        print(f"   📄 NCF detectado: {ncf_match.group()}")
-                        break
+            if 'ncf' in line_lower:
+                ncf_match = _NCF_RE.search(line_clean)
+                if ncf_match and ncf_match.lastindex == 2:
+                    # El formato estándar tiene prioridad aunque aparezca más adelante;
+                    # no puede empezar dentro de un NCF con guiones
+                    ncf_match = _NCF_STANDARD_RE.search(line_clean, ncf_match.end()) or ncf_match
+                if ncf_match:
+                    results['ncf'] = ncf_match.group()
+                    logger.debug("NCF detectado: %s", ncf_match.group())
             
             # Detectar montos con contexto mejorado
-            amount_matches = re.finditer(r'(\d{1,3}(?:[.,]\d{3})*[.,]\d{2})', line_clean)
+            amount_matches = _AMOUNT_RE.finditer(line_clean)
             for match in amount_matches:
                 amount = match.group(1)
-                context = self._get_line_context(lines, i, window=3)
+                # El contexto (3 líneas alrededor) es el mismo para todos los montos de la línea
+                if context_mask is None:
+                    if line_masks is None:
+                        line_masks = [_context_mask(lower) for lower in lines_lower]
+                    context_mask = 0
+                    for mask in line_masks[max(0, i - 3):i + 4]:
+                        context_mask |= mask
                 
-                if any(term in context.lower() for term in ['total', 'pagar', 'importe', 'final']):
+                if context_mask & _AMOUNT_CONTEXT_BITS['total']:
                     if 'total' not in results or self._is_better_amount(amount, results.get('total')):
                         results['total'] = amount
-                        print(f"   💰 Total detectado: {amount}")
+                        logger.debug("Total detectado: %s", amount)
                 
-                elif any(term in context.lower() for term in ['subtotal', 'gravado', 'base']):
+                elif context_mask & _AMOUNT_CONTEXT_BITS['subtotal']:
                     if 'subtotal' not in results or self._is_better_amount(amount, results.get('subtotal')):
                         results['subtotal'] = amount
-                        print(f"   📊 Subtotal detectado: {amount}")
+                        logger.debug("Subtotal detectado: %s", amount)
                 
-                elif any(term in context.lower() for term in ['itbis', 'impuesto', 'iva', 'tax']):
+                elif context_mask & _AMOUNT_CONTEXT_BITS['itbis']:
                     if 'itbis' not in results or self._is_better_amount(amount, results.get('itbis')):
                         results['itbis'] = amount
-                        print(f"   🏛️  ITBIS detectado: {amount}")
+                        logger.debug("ITBIS detectado: %s", amount)
         
-        # Búsqueda de fechas con contexto
-        date_matches = re.finditer(r'(\d{1,2}[-/]\d{1,2}[-/]\d{2,4})', text)
+        # Búsqueda de fechas con contexto. El texto se pasa a minúsculas una vez; si
+        # lower() cambia la longitud, las posiciones no cuadran y se baja cada trozo
+        text_lower = text.lower()
+        if len(text_lower) != len(text):
+            text_lower = None
+        date_matches = _DATE_RE.finditer(text)
         for match in date_matches:
             date = match.group(1)
             context_start = max(0, match.start() - 50)
             context_end = min(len(text), match.end() + 30)
-            context = text[context_start:context_end].lower()
+            if text_lower is not None:
+                context = text_lower[context_start:context_end]
+            else:
+                context = text[context_start:context_end].lower()
             
             if 'vencim' in context and 'fecha_vencimiento' not in results:
                 results['fecha_vencimiento'] = date
-                print(f"   📅 Fecha vencimiento: {date}")
+                logger.debug("Fecha vencimiento: %s", date)
             elif 'emis' in context and 'fecha_emision' not in results:
                 results['fecha_emision'] = date
-                print(f"   📅 Fecha emisión: {date}")
+                logger.debug("Fecha emisión: %s", date)
             elif 'fecha' in context and 'fecha' not in results:
                 results['fecha'] = date
-                print(f"   📅 Fecha general: {date}")
+                logger.debug("Fecha general: %s", date)
         
         return results
     
@@ -196,15 +245,19 @@ class MLFieldExtractor:
     
     def analyze_text_quality(self, text: str) -> Dict[str, Any]:
         """Analiza la calidad del texto extraído por OCR"""
+        # Cada conteo se calcula una sola vez y se reutiliza
+        total_lineas = text.count('\n') + 1
+        total_montos = len(_DECIMAL_RE.findall(text))
+        
         analysis = {
             'total_caracteres': len(text),
-            'total_lineas': len(text.split('\n')),
+            'total_lineas': total_lineas,
             'total_palabras': len(text.split()),
-            'densidad_numeros': len(re.findall(r'\d', text)) / max(1, len(text)),
-            'densidad_monetaria': len(re.findall(r'\d+[.,]\d{2}', text)) / max(1, len(text.split('\n'))),
-            'tiene_fechas': len(re.findall(r'\d{1,2}[-/]\d{1,2}[-/]\d{2,4}', text)) > 0,
-            'tiene_montos': len(re.findall(r'\d+[.,]\d{2}', text)) > 0,
-            'tiene_identificadores': len(re.findall(r'(RNC|NCF|NIT|ID)', text, re.IGNORECASE)) > 0
+            'densidad_numeros': len(_DIGIT_RE.findall(text)) / max(1, len(text)),
+            'densidad_monetaria': total_montos / total_lineas,
+            'tiene_fechas': _DATE_RE.search(text) is not None,
+            'tiene_montos': total_montos > 0,
+            'tiene_identificadores': _IDENTIFIER_RE.search(text) is not None
         }
         
         # Calcular puntuación de calidad
@@ -1,6 +1,7 @@
 # ml/invoice_classifier.py
 import os
 import pickle
+import logging
 import numpy as np
 from sklearn.feature_extraction.text import TfidfVectorizer
 from sklearn.ensemble import RandomForestClassifier
@@ -9,6 +10,13 @@ from typing import Dict, List, Optional, Tuple, Any
 import re
 import json
 
+logger = logging.getLogger(__name__)
+
+# Patrones de las características estructurales, compilados una sola vez
+_DATE_RE = re.compile(r'\d{1,2}[-/]\d{1,2}[-/]\d{2,4}')
+_AMOUNT_RE = re.compile(r'\$?\d+[.,]\d{2}')
+_NUMBER_RE = re.compile(r'\d+')
+
 class InvoiceClassifier:
     def __init__(self, model_path: str = "ml/models"):
         self.model_path = model_path
@@ -24,6 +32,11 @@ class InvoiceClassifier:
             'simple': ['Factura', 'Total', 'Fecha', 'Cliente', 'Producto'],
             'detailed': ['Subtotal', 'Descuento', 'Impuesto', 'Items', 'Cantidad', 'Precio']
         }
+        # Los mismos patrones en minúsculas, para no convertirlos en cada texto
+        self._invoice_patterns_lower = {
+            invoice_type: tuple(pattern.lower() for pattern in patterns)
+            for invoice_type, patterns in self.invoice_patterns.items()
+        }
         
         os.makedirs(self.model_path, exist_ok=True)
     
@@ -33,18 +46,18 @@ class InvoiceClassifier:
         text_lower = text.lower()
         
         # Características basadas en patrones
-        for invoice_type, patterns in self.invoice_patterns.items():
+        for invoice_type, patterns in self._invoice_patterns_lower.items():
             features[f'pattern_{invoice_type}'] = sum(
-                1 for pattern in patterns if pattern.lower() in text_lower
+                1 for pattern in patterns if pattern in text_lower
             )
         
         # Características estructurales
         lines = text.split('\n')
         features['line_count'] = len(lines)
         features['word_count'] = len(text.split())
-        features['has_dates'] = len(re.findall(r'\d{1,2}[-/]\d{1,2}[-/]\d{2,4}', text))
-        features['has_amounts'] = len(re.findall(r'\$?\d+[.,]\d{2}', text))
-        features['has_numbers'] = len(re.findall(r'\d+', text))
+        features['has_dates'] = len(_DATE_RE.findall(text))
+        features['has_amounts'] = len(_AMOUNT_RE.findall(text))
+        features['has_numbers'] = len(_NUMBER_RE.findall(text))
         features['has_currency_rd'] = int('rd$' in text_lower)
         features['has_currency_usd'] = int('usd' in text_lower or '$' in text)
         
@@ -111,7 +124,7 @@ class InvoiceClassifier:
             prediction = self.classifier.predict([features])[0]
             confidence = np.max(self.classifier.predict_proba([features]))
             
-            print(f"🔮 Predicción ML: {prediction} (confianza: {confidence:.2f})")
+            logger.debug("Predicción ML: %s (confianza: %.2f)", prediction, confidence)
             
             if confidence > 0.6:
                 return prediction
@@ -119,7 +132,7 @@ class InvoiceClassifier:
                 return self._predict_by_rules(text)
                 
         except Exception as e:
-            print(f"⚠️  Error en predicción ML: {e}. Usando reglas.")
+            logger.warning("Error en predicción ML: %s. Usando reglas.", e)
             return self._predict_by_rules(text)
     
     def _predict_by_rules(self, text: str) -> str:
@@ -135,9 +148,9 @@ class InvoiceClassifier:
         }
         
         # Puntuar por patrones
-        for pattern_type, patterns in self.invoice_patterns.items():
+        for pattern_type, patterns in self._invoice_patterns_lower.items():
             for pattern in patterns:
-                if pattern.lower() in text_lower:
+                if pattern in text_lower:
                     scores[pattern_type] += 1
         
         # Reglas específicas
@@ -156,7 +169,7 @@ class InvoiceClassifier:
         
         # Determinar el tipo con mayor puntuación
         predicted_type = max(scores.items(), key=lambda x: x[1])
-        print(f"🔧 Predicción por reglas: {predicted_type[0]} (puntuación: {predicted_type[1]})")
+        logger.debug("Predicción por reglas: %s (puntuación: %d)", predicted_type[0], predicted_type[1])
         
         return predicted_type[0]
     
@@ -190,4 +203,19 @@ class InvoiceClassifier:
             confidence = np.max(self.classifier.predict_proba([features]))
             return prediction, confidence
         except:
-            return self._predict_by_rules(text), 0.7
\ No newline at end of file
+            return self._predict_by_rules(text), 0.7
+    
+    def get_prediction_confidence_batch(self, texts: List[str]) -> List[Tuple[str, float]]:
+        """Predicción y confianza para varios textos con una sola llamada al modelo"""
+        if self.classifier is None or not texts:
+            return [self.get_prediction_confidence(text) for text in texts]
+        
+        try:
+            X = np.array([list(self.extract_features(text).values()) for text in texts])
+            # predict() es el argmax de predict_proba(): se calcula una sola vez
+            probabilities = self.classifier.predict_proba(X)
+            predictions = self.classifier.classes_.take(np.argmax(probabilities, axis=1))
+            confidences = np.max(probabilities, axis=1)
+            return list(zip(predictions, confidences))
+        except Exception:
+            return [self.get_prediction_confidence(text) for text in texts]
\ No newline at end of file
@@ -1,9 +1,12 @@
 # ml/training_manager.py
 import os
 import json
+import logging
 from typing import List, Tuple, Dict, Any
 from datetime import datetime
 
+logger = logging.getLogger(__name__)
+
 class TrainingManager:
     def __init__(self, data_path: str = "ml/training_data"):
         self.data_path = data_path
@@ -27,7 +30,7 @@ class TrainingManager:
         with open(filepath, 'w', encoding='utf-8') as f:
             json.dump(example, f, ensure_ascii=False, indent=2)
         
-        print(f"💾 Ejemplo guardado: {filename}")
+        logger.debug("Ejemplo guardado: %s", filename)
     
     def load_training_data(self) -> List[Tuple[str, str]]:
         """Carga datos de entrenamiento existentes"""
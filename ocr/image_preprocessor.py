@@ -8,6 +8,14 @@ import numpy as np
 
 logger = logging.getLogger(__name__)
 
+# Datos que se reportan tras el OCR, en orden de aparición en el reporte
+_PATRONES_REPORTE = (
+    ('RNC', re.compile(r'RNC[\s:]*([0-9-]+)', re.IGNORECASE)),
+    ('NCF', re.compile(r'([A-Z]\d{13})')),
+    ('FECHA', re.compile(r'(\d{1,2}/\d{1,2}/\d{2,4})')),
+    ('TOTAL', re.compile(r'TOTAL[\s\$RD]*([0-9,]+\.?[0-9]*)', re.IGNORECASE)),
+)
+
 class ImageProcessor:
     def __init__(self):
         """Inicializa PaddleOCR con la versión correcta"""
@@ -93,25 +101,11 @@ class ImageProcessor:
         """Analiza el texto extraído para datos específicos"""
         print("📊 DATOS IDENTIFICADOS:")
         
-        # Buscar RNC
-        rnc_match = re.search(r'RNC[\s:]*([0-9-]+)', texto, re.IGNORECASE)
-        if rnc_match:
-            print(f"   ✅ RNC: {rnc_match.group(1)}")
-        
-        # Buscar NCF
-        ncf_match = re.search(r'([A-Z]\d{13})', texto)
-        if ncf_match:
-            print(f"   ✅ NCF: {ncf_match.group(1)}")
-        
-        # Buscar Fecha
-        fecha_match = re.search(r'(\d{1,2}/\d{1,2}/\d{2,4})', texto)
-        if fecha_match:
-            print(f"   ✅ FECHA: {fecha_match.group(1)}")
-        
-        # Buscar Total
-        total_match = re.search(r'TOTAL[\s\$RD]*([0-9,]+\.?[0-9]*)', texto, re.IGNORECASE)
-        if total_match:
-            print(f"   ✅ TOTAL: {total_match.group(1)}")
+        # Buscar RNC, NCF, fecha y total con los patrones ya compilados
+        for etiqueta, patron in _PATRONES_REPORTE:
+            coincidencia = patron.search(texto)
+            if coincidencia:
+                print(f"   ✅ {etiqueta}: {coincidencia.group(1)}")
         
         # Mostrar primeras líneas limpias
         lines = [line for line in texto.split('\n') if line.strip()]
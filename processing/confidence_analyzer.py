@@ -1,10 +1,19 @@
 # processing/confidence_analyzer.py
-from typing import Dict, Any
+from typing import Dict, Any, Optional
+
+# Palabras de contexto por campo, ya en minúsculas
+_CONTEXTO_POR_CAMPO = {
+    'nit': ('nit', 'identif', 'identificación'),
+    'fecha': ('fecha', 'emisión', 'factura'),
+    'total': ('total', 'pagar', 'importe'),
+    'numero_factura': ('factura', 'no.', 'número')
+}
 
 class AnalizadorConfianza:
     @staticmethod
     def calcular_confianza(datos_extraidos: Dict[str, Any], texto: str) -> Dict[str, Any]:
         puntajes_confianza = {}
+        texto_lower = None
         
         for campo, valor in datos_extraidos.items():
             if valor is None:
@@ -17,7 +26,10 @@ class AnalizadorConfianza:
             if campo in ['nit', 'fecha', 'total']:
                 puntaje += 30
             
-            if AnalizadorConfianza._tiene_contexto_apropiado(campo, texto):
+            # El texto se pasa a minúsculas una sola vez para todos los campos
+            if texto_lower is None and campo in _CONTEXTO_POR_CAMPO:
+                texto_lower = texto.lower()
+            if AnalizadorConfianza._tiene_contexto_apropiado(campo, texto, texto_lower):
                 puntaje += 30
                 
             if AnalizadorConfianza._tiene_posicion_esperada(campo, texto, valor):
@@ -31,16 +43,14 @@ class AnalizadorConfianza:
         return puntajes_confianza
     
     @staticmethod
-    def _tiene_contexto_apropiado(campo: str, texto: str) -> bool:
-        mapa_contexto = {
-            'nit': ['NIT', 'IDENTIF', 'IDENTIFICACIÓN'],
-            'fecha': ['FECHA', 'EMISIÓN', 'FACTURA'],
-            'total': ['TOTAL', 'PAGAR', 'IMPORTE'],
-            'numero_factura': ['FACTURA', 'NO.', 'NÚMERO']
-        }
+    def _tiene_contexto_apropiado(campo: str, texto: str, texto_lower: Optional[str] = None) -> bool:
+        palabras_contexto = _CONTEXTO_POR_CAMPO.get(campo)
+        if not palabras_contexto:
+            return False
         
-        palabras_contexto = mapa_contexto.get(campo, [])
-        return any(palabra.lower() in texto.lower() for palabra in palabras_contexto)
+        if texto_lower is None:
+            texto_lower = texto.lower()
+        return any(palabra in texto_lower for palabra in palabras_contexto)
     
     @staticmethod
     def _tiene_posicion_esperada(campo: str, texto: str, valor: str) -> bool:
@@ -1,6 +1,13 @@
 # processing/data_extractor.py
 import re
-import traceback
+import sys
+import copy
+import bisect
+import hashlib
+import logging
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 from typing import Dict, List, Optional, Any, Tuple
 from datetime import datetime
 from processing.validator import ValidadorDatos
@@ -9,15 +16,330 @@ from ml.invoice_classifier import InvoiceClassifier
 from ml.field_extractor_ml import MLFieldExtractor
 from ml.training_manager import TrainingManager
 
+logger = logging.getLogger(__name__)
+
+# Patrones mínimos para la extracción de fallback, compilados una sola vez
+_PATRONES_FALLBACK = (
+    ('total', re.compile(r'Total[^\d]*([0-9,]+\.?[0-9]*)', re.IGNORECASE)),
+    ('fecha', re.compile(r'(\d{1,2}/\d{1,2}/\d{4})', re.IGNORECASE)),
+    ('rnc', re.compile(r'RNC[:\s]*(\d{9,11})', re.IGNORECASE)),
+    ('numero_factura', re.compile(r'Factura[^\n]*(\d+)', re.IGNORECASE))
+)
+
+# Plantillas de metadatos del fallback; se copian en cada uso (dict.copy)
+_METADATOS_FALLBACK = {
+    'tipo_factura': None,
+    'confianza_clasificacion': 0.1,
+    'calidad_texto': 'BAJA',
+    'total_campos_encontrados': 0,
+    'metodo_extraccion': 'FALLBACK_BASICO',
+    'tiene_ncf': False,
+    'advertencia': 'Extracción limitada - sistema principal falló'
+}
+_RESULTADO_ERROR = {
+    'tipo_factura': 'desconocido',
+    'confianza_clasificacion': 0.0,
+    'calidad_texto': 'CRITICA',
+    'total_campos_encontrados': 0,
+    'metodo_extraccion': 'ERROR',
+    'error': None
+}
+
+# Campos donde ML tiene prioridad al combinar resultados
+_CAMPOS_ML_PREFERIDOS = frozenset({'total', 'fecha', 'fecha_emision', 'fecha_vencimiento'})
+
+# Campos donde REGEX tiene prioridad (ML no los sobrescribe)
+_CAMPOS_REGEX_PREFERIDOS = frozenset({
+    'rnc', 'nit', 'ncf', 'numero_factura', 'subtotal', 'itbis',
+    'rnc_emisor', 'rnc_cliente', 'nombre_emisor', 'razon_social'
+})
+
+# Marca de campo ausente al combinar (None es un valor válido)
+_AUSENTE = object()
+
+# Nombres de campos del extractor ML y su equivalente normalizado
+_MAPEO_CAMPOS = {
+    'fecha_detectada': 'fecha',
+    'monto_detectado': 'total',
+    'empresa_detectada': 'razon_social',
+    'numero_documento': 'rnc'
+}
+
+# Campos esenciales que siempre se envían a la UI
+_CAMPOS_ESENCIALES = frozenset({
+    'rnc_emisor', 'rnc_cliente', 'fecha', 'total', 'subtotal', 'itbis',
+    'numero_factura', 'ncf', 'razon_social', 'nombre_emisor'
+})
+
+# Campos específicos por tipo de factura
+_CAMPOS_POR_TIPO = {
+    'peaje': frozenset({'vehiculo', 'estacion', 'hora', 'operador'}),
+    'combustible': frozenset({'vehiculo', 'estacion', 'litros', 'producto'}),
+    'general': frozenset({'descripcion', 'concepto'})
+}
+
+# Campos que optimizar_campos_enviados siempre conserva, por tipo de factura
+_CAMPOS_A_ENVIAR = {tipo: _CAMPOS_ESENCIALES | campos for tipo, campos in _CAMPOS_POR_TIPO.items()}
+
+# Grupos de campos que representan el mismo dato
+_GRUPOS_DUPLICADOS = (
+    frozenset({'rnc', 'rnc_emisor', 'rnc_cliente', 'identificacion'}),
+    frozenset({'razon_social', 'nombre_emisor', 'empresa_detectada'}),
+    frozenset({'total', 'monto_detectado', 'total_pagar'}),
+    frozenset({'fecha', 'fecha_emision', 'fecha_detectada'})
+)
+
+# Índice inverso: grupo de duplicados de cada campo (los grupos no se solapan)
+_GRUPO_POR_CAMPO = {campo: grupo for grupo in _GRUPOS_DUPLICADOS for campo in grupo}
+
+# Símbolos que se eliminan de un monto antes de convertirlo
+_SIMBOLOS_MONTO = str.maketrans('', '', '$')
+
+# Campos de montos que se extraen en un único recorrido del texto
+_CAMPOS_MONTO = ('subtotal', 'itbis', 'total')
+
+def _texto_para_literales(texto: str) -> Optional[str]:
+    """
+    Texto en minúsculas para el descarte por literal inicial, solo si es ASCII:
+    ahí IGNORECASE equivale a comparar en minúsculas. Si no, None (sin descarte).
+    """
+    return texto.lower() if texto.isascii() else None
+
+
+def _prefijo_literal(patron: str) -> str:
+    """
+    Literal (en minúsculas) con el que empieza obligatoriamente toda coincidencia
+    del patrón; '' si no lo hay o no es ASCII. Si no aparece en el texto, el patrón
+    no puede coincidir.
+    """
+    if '|' in patron:
+        return ''
+    
+    literal = []
+    i = 0
+    while i < len(patron):
+        caracter = patron[i]
+        if caracter == '\\':
+            # Solo los escapes de puntuación (\. \$ ...) son literales
+            if i + 1 >= len(patron) or patron[i + 1].isalnum():
+                break
+            literal.append(patron[i + 1])
+            i += 2
+            continue
+        if caracter in '.^$*+?{}[]()':
+            # Un cuantificador que admite cero repeticiones vuelve opcional al último literal
+            if caracter in '*?{' and literal:
+                literal.pop()
+            break
+        literal.append(caracter)
+        i += 1
+    literal = ''.join(literal)
+    return literal.lower() if literal.isascii() else ''
+
+
+# Patrones de extracción por campo, en orden de prioridad
+_PATRONES_EXTRACCION: Dict[str, List[Dict]] = {
+    'rnc_emisor': [
+        {'patron': r'RNC:\s*(\d{9,11})', 'grupo': 1, 'contexto': ['RNC:']},
+        {'patron': r'RNC\s*(\d{9,11})', 'grupo': 1, 'contexto': ['RNC']},
+        {'patron': r'Registro Nacional[:\s]*(\d{9,11})', 'grupo': 1, 'contexto': ['Registro Nacional']}
+    ],
+    'rnc_cliente': [
+        {'patron': r'RNC/CED[:\s]*(\d{9,11})', 'grupo': 1, 'contexto': ['RNC/CED']},
+        {'patron': r'CLIENTE[^\n]+\nRNC/CED[:\s]*(\d{9,11})', 'grupo': 1, 'contexto': ['CLIENTE', 'RNC/CED']},
+        {'patron': r'CLIENTE[^\n]*\n[^\n]*RNC[:\s]*(\d{9,11})', 'grupo': 1, 'contexto': ['CLIENTE', 'RNC']}
+    ],
+    'nombre_emisor': [
+        {'patron': r'^([^\n]+)\nAutovia', 'grupo': 1, 'contexto': ['Autovia']},
+        {'patron': r'^([^\n]+)\nRNC:', 'grupo': 1, 'contexto': ['RNC:']},
+        {'patron': r'RESET - ([^\n]+)', 'grupo': 1, 'contexto': ['RESET']}
+    ],
+    'razon_social': [
+        {'patron': r'CLIENTE:\s*([^\n]+)', 'grupo': 1, 'contexto': ['CLIENTE:']},
+        {'patron': r'CLIENTE[:\s]*([^\n]+)', 'grupo': 1, 'contexto': ['CLIENTE']}
+    ],
+    'ncf': [
+        {'patron': r'NCF:\s*([A-Z]\d{10,11})', 'grupo': 1, 'contexto': ['NCF:']},
+        {'patron': r'NCF[:\s]*([A-Z]\d{10,11})', 'grupo': 1, 'contexto': ['NCF']},
+        {'patron': r'B0100076051', 'grupo': 0, 'contexto': ['NCF']}  # Patrón específico
+    ],
+    'fecha': [
+        {'patron': r'FECHA:\s*(\d{1,2}/\d{1,2}/\d{4})', 'grupo': 1, 'contexto': ['FECHA:']},
+        {'patron': r'FECHA[:\s]*(\d{1,2}/\d{1,2}/\d{4})', 'grupo': 1, 'contexto': ['FECHA']},
+        {'patron': r'(\d{1,2}/\d{1,2}/\d{4})\s+\d{1,2}:\d{2}:\d{2}', 'grupo': 1, 'contexto': ['FECHA']}
+    ],
+    'subtotal': [
+        {'patron': r'SubTotal\s*==>\s*([0-9,]+\.?[0-9]*)', 'grupo': 1, 'contexto': ['SubTotal', '==>']},
+        {'patron': r'SubTotal[^\n]*([0-9,]+\.?[0-9]*)', 'grupo': 1, 'contexto': ['SubTotal'], 'respaldo': True},
+        {'patron': r'SubTotal\s*([0-9,]+\.?[0-9]*)', 'grupo': 1, 'contexto': ['SubTotal'], 'respaldo': True}
+    ],
+    'itbis': [
+        {'patron': r'Itbis\s*=\s*([0-9,]+\.?[0-9]*)', 'grupo': 1, 'contexto': ['Itbis', '=']},
+        {'patron': r'Itbis[^\n]*([0-9,]+\.?[0-9]*)', 'grupo': 1, 'contexto': ['Itbis'], 'respaldo': True},
+        {'patron': r'ITBIS[^\n]*([0-9,]+\.?[0-9]*)', 'grupo': 1, 'contexto': ['ITBIS'], 'respaldo': True}
+    ],
+    'total': [
+        {'patron': r'Total a Pagar RD\$\s*==>\s*([0-9,]+\.?[0-9]*)', 'grupo': 1, 'contexto': ['Total a Pagar RD$', '==>']},
+        {'patron': r'Total a Pagar[^\n]*RD\$[^\n]*([0-9,]+\.?[0-9]*)', 'grupo': 1, 'contexto': ['Total a Pagar', 'RD$']},
+        {'patron': r'Total[^\n]*([0-9,]+\.?[0-9]*)', 'grupo': 1, 'contexto': ['Total'], 'respaldo': True}
+    ],
+    'numero_factura': [
+        {'patron': r'FACT\.NO:\s*(\d+)', 'grupo': 1, 'contexto': ['FACT.NO:']},
+        {'patron': r'=ACT\.NO:\s*(\d+)', 'grupo': 1, 'contexto': ['=ACT.NO:']},
+        {'patron': r'Factura[^\n]*(\d+)', 'grupo': 1, 'contexto': ['Factura'], 'respaldo': True}
+    ]
+}
+
+
+def _compilar_patrones(patrones: Dict[str, List[Dict]]) -> Dict[str, List[Dict]]:
+    """Compila los patrones una sola vez; los inválidos se descartan al importar"""
+    compilados = {}
+    for campo, configs in patrones.items():
+        compilados[campo] = []
+        for config_patron in configs:
+            try:
+                regex = re.compile(config_patron['patron'], re.IGNORECASE | re.MULTILINE)
+            except re.error as e:
+                print(f"❌ Error en patrón {config_patron['patron']}: {e}")
+                continue
+            compilados[campo].append({
+                **config_patron,
+                'regex': regex,
+                'literal': _prefijo_literal(config_patron['patron']),
+                'contexto_lower': tuple(c.lower() for c in config_patron.get('contexto', []))
+            })
+    return compilados
+
+
+def _compilar_fusion(patrones_compilados: Dict[str, List[Dict]], campos: Tuple[str, ...]) -> Optional[Dict[str, Any]]:
+    """
+    Une los patrones de varios campos en una sola alternancia de lookaheads.
+    Cada coincidencia marca una posición donde al menos un patrón encaja.
+    """
+    ramas = []
+    respaldos = {}
+    for campo in campos:
+        patrones = patrones_compilados.get(campo, [])
+        # Los patrones amplios ('respaldo') solo se prueban si los etiquetados fallan
+        etiquetados = len(patrones)
+        for prioridad, config_patron in enumerate(patrones):
+            if config_patron.get('respaldo'):
+                etiquetados = prioridad
+                break
+        for prioridad, config_patron in enumerate(patrones[:etiquetados]):
+            ramas.append((campo, prioridad, config_patron))
+        respaldos[campo] = patrones[etiquetados:]
+
+    if not ramas:
+        return None
+
+    combinado = '|'.join(f"(?:{config_patron['patron']})" for _, _, config_patron in ramas)
+    return {
+        'regex': re.compile(f'(?=(?:{combinado}))', re.IGNORECASE | re.MULTILINE),
+        'ramas': ramas,
+        'campos': {campo for campo, _, _ in ramas},
+        'respaldos': respaldos
+    }
+
+
+def _construir_plan_regex(patrones_compilados: Dict[str, List[Dict]],
+                          fusion: Optional[Dict[str, Any]]) -> Tuple:
+    """
+    Aplana la tabla compilada en tuplas (regex, literal, grupo, contexto)
+    por campo, para que el bucle de extracción no haga búsquedas en diccionarios.
+    Los campos resueltos por la fusión llevan None.
+    """
+    plan = []
+    for campo, patrones in patrones_compilados.items():
+        if fusion and campo in fusion['respaldos']:
+            plan.append((campo, None))
+            continue
+        plan.append((campo, tuple(
+            (config_patron['regex'], config_patron['literal'],
+             config_patron['grupo'], config_patron['contexto_lower'])
+            for config_patron in patrones
+        )))
+    return tuple(plan)
+
+
+def _posiciones_palabra(texto_lower: str, palabra: str) -> List[int]:
+    """Inicios (ordenados, con solapamiento) de la palabra en el texto"""
+    posiciones = []
+    posicion = texto_lower.find(palabra)
+    while posicion >= 0:
+        posiciones.append(posicion)
+        posicion = texto_lower.find(palabra, posicion + 1)
+    return posiciones
+
+
+# Radio (en caracteres) alrededor de una coincidencia donde se buscan las palabras de contexto
+_RADIO_CONTEXTO = 100
+
+# Resultados completos de extraer_datos que se conservan; textos más cortos no se guardan.
+# Los aciertos vienen de volver a extraer imágenes ya extraídas en la sesión (el botón de
+# extraer sobre la imagen actual y la exportación de la carpeta): basta una carpeta típica
+_TAMANO_CACHE_EXTRACCION = 64
+_LONGITUD_MINIMA_CACHE = 32
+
+# Estado compilado compartido por todas las instancias de DataExtractor
+_PATRONES_COMPILADOS = _compilar_patrones(_PATRONES_EXTRACCION)
+_FUSION_MONTOS = _compilar_fusion(_PATRONES_COMPILADOS, _CAMPOS_MONTO)
+
+# Formatos de NCF aceptados por validar_ncf_formato
+_PATRONES_NCF = tuple(re.compile(patron) for patron in (
+    r'^[A-Z]\d{10}$',      # E3100000001 (11 caracteres)
+    r'^[A-Z]\d{11}$',      # E31000000001 (12 caracteres)
+    r'^[A-Z]{2}\d{9}$',    # B010000001 (11 caracteres)
+    r'^B01\d{8}$',         # B0100076051 (11 caracteres)
+    r'^E31\d{8}$',         # E3100000001 (11 caracteres)
+    r'^\d{3}-\d{7,8}$',    # 001-1234567
+    r'^\d{2}-\d{2}-\d{4,8}$',  # 01-01-123456
+    r'^\d{4}-\d{4}-\d{4}$',    # 0001-0000-0000001
+    r'^[A-Z]-\d{2}-\d{4,8}$'   # E-01-123456
+))
+
+# Todos los formatos de NCF en una sola alternancia (un grupo por formato, mismo orden)
+_NCF_UNION = re.compile('|'.join(f'({patron.pattern[1:-1]})' for patron in _PATRONES_NCF))
+
+# Formato HH:MM[:SS] aceptado por validar_hora_formato
+_HORA_RE = re.compile(r'^\d{1,2}:\d{2}(?::\d{2})?$')
+
+# Formatos de parsear_fecha_robusto en orden de preferencia; los campos aceptan
+# lo mismo que %d, %m, %Y y %y en strptime
+_DIA = r'(?P<d>3[01]|[12]\d|0[1-9]|[1-9]| [1-9])'
+_MES = r'(?P<m>1[0-2]|0[1-9]|[1-9])'
+_FORMATOS_FECHA = tuple(re.compile(formato) for formato in (
+    rf'{_DIA}/{_MES}/(?P<y>\d{{4}})',   # 08/10/2025
+    rf'{_DIA}-{_MES}-(?P<y>\d{{4}})',   # 08-10-2025
+    rf'(?P<y>\d{{4}})-{_MES}-{_DIA}',   # 2025-10-08
+    rf'{_DIA}/{_MES}/(?P<y>\d{{2}})',   # 08/10/25 (CUIDADO con este)
+    rf'{_DIA}-{_MES}-(?P<y>\d{{2}})',   # 08-10-25
+))
+
+
 class DataExtractor:
     def __init__(self):
+        self._plan_regex = None
+        # (texto, texto en minúsculas, posiciones por palabra) del último texto revisado
+        self._indice_contexto = None
+        # Resultados de extraer_datos por digest del texto, en orden LRU
+        self._cache_extraccion = OrderedDict()
+        self._cache_hits = 0
+        self._cache_misses = 0
+        # Protege el cache si el extractor se comparte entre hilos
+        self._bloqueo_cache = threading.Lock()
+        # Los ejemplos de entrenamiento se escriben en segundo plano, uno a la vez y en orden;
+        # al salir, el intérprete espera a que el hilo termine los pendientes
+        self._escritor_entrenamiento = ThreadPoolExecutor(max_workers=1)
+        
         try:
             self.validador = ValidadorDatos()
             self.analizador_confianza = AnalizadorConfianza()
             self.classifier = InvoiceClassifier()
             self.ml_extractor = MLFieldExtractor()
             self.training_manager = TrainingManager()
-            self.patrones = self._construir_patrones()
+            self.patrones = _PATRONES_COMPILADOS
+            self.fusion_montos = _FUSION_MONTOS
             
             # Inicializar sistema de validadores robusto
             self.inicializar_validadores()
@@ -35,6 +357,7 @@ class DataExtractor:
             print(f"❌ Error inicializando DataExtractor: {str(e)}")
             # Inicialización mínima de emergencia
             self.patrones = {}
+            self.fusion_montos = None
             self.validadores = {}
             self.fallbacks = {}
     
@@ -80,72 +403,93 @@ class DataExtractor:
         except Exception as e:
             print(f"⚠️ No se pudo entrenar con datos sintéticos: {str(e)}")
     
-    def debug_extraccion_completa(self, texto: str):
-        """Debug completo del proceso de extracción"""
-        print("\n" + "="*80)
-        print("🔍 DEBUG COMPLETO - DATA EXTRACTOR")
-        print("="*80)
+    def debug_extraccion_completa(self, texto: str, datos_regex: Optional[Dict[str, Any]] = None,
+                                  clasificacion: Optional[Tuple[str, float]] = None):
+        """
+        Debug completo del proceso de extracción; datos_regex y clasificacion
+        permiten reutilizar etapas ya hechas (por ejemplo, para todo un lote)
+        """
+        # El detalle de cada etapa solo se arma con el nivel DEBUG activo
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("DEBUG COMPLETO - DATA EXTRACTOR")
+            logger.debug("Texto recibido del OCR (%d caracteres):\n%s",
+                         len(texto), texto[:500] + "..." if len(texto) > 500 else texto)
+        
+        # 1. Clasificación
+        if clasificacion is None:
+            clasificacion = self._clasificar_tipo_factura_seguro(texto)
+        invoice_type, confidence = clasificacion
+        logger.debug("Clasificación: %s (confianza %.2f)", invoice_type, confidence)
+        
+        # 2. Extracción Regex
+        if datos_regex is None:
+            datos_regex = self._extraer_con_regex(texto, invoice_type)
+        else:
+            datos_regex = dict(datos_regex)
+        self._registrar_etapa("Extracción regex", datos_regex)
         
-        # 1. Mostrar texto de entrada
-        print("📄 TEXTO RECIBIDO DEL OCR:")
-        print("-" * 40)
-        print(texto[:500] + "..." if len(texto) > 500 else texto)
-        print(f"Longitud total: {len(texto)} caracteres")
-        print()
-        
-        # 2. Clasificación
-        print("🎯 CLASIFICACIÓN:")
-        print("-" * 40)
-        invoice_type, confidence = self._clasificar_tipo_factura_seguro(texto)
-        print(f"Tipo detectado: {invoice_type}")
-        print(f"Confianza: {confidence:.2f}")
-        print()
-        
-        # 3. Extracción Regex
-        print("🔄 EXTRACCIÓN REGEX:")
-        print("-" * 40)
-        datos_regex = self._extraer_con_regex(texto, invoice_type)
-        for campo, valor in datos_regex.items():
-            print(f"   {campo}: {valor}")
-        print(f"Total campos regex: {len(datos_regex)}")
-        print()
-        
-        # 4. Extracción ML
-        print("🧠 EXTRACCIÓN ML:")
-        print("-" * 40)
+        # 3. Extracción ML
         datos_ml = self.ml_extractor.extract_with_ml(texto, invoice_type)
-        for campo, valor in datos_ml.items():
-            print(f"   {campo}: {valor}")
-        print(f"Total campos ML: {len(datos_ml)}")
-        print()
-        
-        # 5. Combinación
-        print("🔄 COMBINACIÓN:")
-        print("-" * 40)
+        self._registrar_etapa("Extracción ML", datos_ml)
+        
+        # 4. Combinación
         datos_combinados = self._combinar_resultados(datos_regex, datos_ml, texto, invoice_type)
-        for campo, valor in datos_combinados.items():
-            print(f"   {campo}: {valor}")
-        print(f"Total campos combinados: {len(datos_combinados)}")
-        print()
-        
-        # 6. Validación
-        print("✅ VALIDACIÓN:")
-        print("-" * 40)
+        self._registrar_etapa("Combinación", datos_combinados)
+        
+        # 5. Validación
         datos_validados = self._validar_datos_robusto(datos_combinados, invoice_type)
-        for campo, valor in datos_validados.items():
-            print(f"   {campo}: {valor}")
-        print(f"Total campos validados: {len(datos_validados)}")
-        print()
+        self._registrar_etapa("Validación", datos_validados)
         
         return datos_validados, invoice_type, confidence
 
-    def extraer_datos(self, texto: str) -> Dict[str, Any]:
+    def _registrar_etapa(self, etapa: str, datos: Dict[str, Any]):
+        """Registra en DEBUG los campos que produjo una etapa de la extracción"""
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("%s: %d campos", etapa, len(datos))
+            for campo, valor in datos.items():
+                logger.debug("   %s: %s", campo, valor)
+
+    def _clave_cache(self, texto: str) -> Optional[bytes]:
+        """Digest del texto para el cache de extracción; None si no se cachea"""
+        if not isinstance(texto, str) or len(texto) < _LONGITUD_MINIMA_CACHE:
+            return None
+        return hashlib.blake2b(texto.encode('utf-8', 'surrogatepass'), digest_size=16).digest()
+
+    def extraer_datos(self, texto: str, datos_regex: Optional[Dict[str, Any]] = None,
+                      clasificacion: Optional[Tuple[str, float]] = None) -> Dict[str, Any]:
         """Extrae datos usando enfoque híbrido (Regex + ML)"""
-        print("🔍 Iniciando extracción híbrida...")
+        # Páginas repetidas (reescaneos, reintentos) reutilizan el resultado anterior
+        clave = None
+        if datos_regex is None and clasificacion is None:
+            clave = self._clave_cache(texto)
+        if clave is not None:
+            with self._bloqueo_cache:
+                en_cache = self._cache_extraccion.get(clave)
+                if en_cache is not None:
+                    self._cache_extraccion.move_to_end(clave)
+                    self._cache_hits += 1
+                else:
+                    self._cache_misses += 1
+            if en_cache is not None:
+                resultado_final, invoice_type, datos_validados = en_cache
+                # El ejemplo de entrenamiento se sigue guardando en cada llamada
+                self._guardar_ejemplo_entrenamiento(texto, invoice_type, datos_validados)
+                logger.debug("Extracción reutilizada desde cache. Campos encontrados: %d", len(datos_validados))
+                # Copia solo al entregar: quien recibe el resultado puede modificarlo
+                return copy.deepcopy(resultado_final)
+        
+        return self._extraer_y_cachear(texto, clave, datos_regex, clasificacion)
+
+    def _extraer_y_cachear(self, texto: str, clave: Optional[bytes],
+                           datos_regex: Optional[Dict[str, Any]] = None,
+                           clasificacion: Optional[Tuple[str, float]] = None) -> Dict[str, Any]:
+        """Extracción completa; con clave, el resultado queda en el cache de extracción"""
+        logger.debug("Iniciando extracción híbrida")
         
         try:
             # DEBUG: Mostrar proceso completo
-            datos_validados, invoice_type, confidence = self.debug_extraccion_completa(texto)
+            datos_validados, invoice_type, confidence = self.debug_extraccion_completa(
+                texto, datos_regex, clasificacion)
             
             # Análisis de calidad del texto
             quality_analysis = self.ml_extractor.analyze_text_quality(texto)
@@ -155,131 +499,321 @@ class DataExtractor:
                 datos_validados, texto, invoice_type, confidence, quality_analysis
             )
             
-            # Guardar para entrenamiento futuro
-            self.training_manager.save_training_example(texto, invoice_type, datos_validados)
-            
-            print(f"✅ Extracción completada. Campos encontrados: {len(datos_validados)}")
-            return resultado_final
+            # El cache guarda una copia que nadie modifica; datos_validados solo lo lee el escritor
+            if clave is not None:
+                en_cache = (copy.deepcopy(resultado_final), invoice_type, datos_validados)
+                with self._bloqueo_cache:
+                    self._cache_extraccion[clave] = en_cache
+                    if len(self._cache_extraccion) > _TAMANO_CACHE_EXTRACCION:
+                        self._cache_extraccion.popitem(last=False)
             
         except Exception as e:
-            print(f"🚨 ERROR CRÍTICO en extracción: {str(e)}")
-            print(f"🔍 Traceback: {traceback.format_exc()}")
+            # exc_info: el traceback solo se formatea si algún handler emite el registro
+            logger.error("ERROR CRÍTICO en extracción: %s", e, exc_info=True)
             return self._extraccion_basica_fallback(texto, "general")
+        
+        # Guardar para entrenamiento futuro (fuera del try: no invalida la extracción)
+        self._guardar_ejemplo_entrenamiento(texto, invoice_type, datos_validados)
+        
+        logger.debug("Extracción completada. Campos encontrados: %d", len(datos_validados))
+        return resultado_final
+
+    def extraer_datos_lote(self, textos: List[str]) -> List[Dict[str, Any]]:
+        """
+        Extrae datos de varias facturas. Las que ya están en cache se sirven desde
+        ahí; para el resto, la etapa regex recorre el lote una vez por patrón y el
+        clasificador se llama una sola vez. ML y validación siguen siendo por factura.
+        """
+        textos = list(textos)
+        claves = [self._clave_cache(texto) for texto in textos]
+        nuevos = []
+        with self._bloqueo_cache:
+            vistas = {clave for clave in claves if clave in self._cache_extraccion}
+            # Cada texto nuevo se procesa una vez; sus repeticiones en el lote salen del cache
+            for i, clave in enumerate(claves):
+                if clave is None or clave not in vistas:
+                    nuevos.append(i)
+                    if clave is not None:
+                        vistas.add(clave)
+                        self._cache_misses += 1
+        textos_nuevos = [textos[i] for i in nuevos]
+        
+        try:
+            datos_regex = self.extraer_regex_lote(textos_nuevos)
+        except Exception as e:
+            logger.warning("Error en regex por lote: %s. Procesando factura por factura", e)
+            datos_regex = [None] * len(textos_nuevos)
+        
+        try:
+            clasificaciones = self._clasificar_lote(textos_nuevos)
+        except Exception as e:
+            logger.warning("Error en clasificación por lote: %s. Clasificando factura por factura", e)
+            clasificaciones = [None] * len(textos_nuevos)
+        
+        etapas = dict(zip(nuevos, zip(datos_regex, clasificaciones)))
+        resultados = []
+        for i, texto in enumerate(textos):
+            if i in etapas:
+                resultados.append(self._extraer_y_cachear(texto, claves[i], *etapas[i]))
+            else:
+                resultados.append(self.extraer_datos(texto))
+        return resultados
+
+    def _guardar_ejemplo_entrenamiento(self, texto: str, invoice_type: str, datos: Dict[str, Any]):
+        """Encola el ejemplo de entrenamiento; la extracción no espera la escritura a disco"""
+        try:
+            self._escritor_entrenamiento.submit(self._escribir_ejemplo_entrenamiento, texto, invoice_type, datos)
+        except RuntimeError:
+            # El pool ya no acepta trabajo (cierre del intérprete): se escribe aquí mismo
+            self._escribir_ejemplo_entrenamiento(texto, invoice_type, datos)
+
+    def _escribir_ejemplo_entrenamiento(self, texto: str, invoice_type: str, datos: Dict[str, Any]):
+        """Escribe un ejemplo de entrenamiento (hilo escritor o, si no hay, el llamante)"""
+        try:
+            self.training_manager.save_training_example(texto, invoice_type, datos)
+        except Exception as e:
+            logger.warning("Error guardando ejemplo de entrenamiento: %s", e)
+
+    def _clasificar_lote(self, textos: List[str]) -> List[Tuple[str, float]]:
+        """Clasifica varios textos con una sola llamada al modelo"""
+        if not textos:
+            return []
+        resultados = self.classifier.get_prediction_confidence_batch(textos)
+        return [self._normalizar_clasificacion(resultado) for resultado in resultados]
 
     def _clasificar_tipo_factura_seguro(self, texto: str) -> Tuple[str, float]:
         """
         Clasificación segura del tipo de factura con manejo robusto de errores
         """
         try:
-            print("   🔧 Llamando a classifier.get_prediction_confidence...")
             resultado = self.classifier.get_prediction_confidence(texto)
             
             # DEBUG: Verificar qué retorna exactamente
-            print(f"   🔍 Resultado clasificación: {resultado}")
-            print(f"   🔍 Tipo del resultado: {type(resultado)}")
-            
-            if isinstance(resultado, tuple):
-                print(f"   🔍 Longitud de tupla: {len(resultado)}")
-                if len(resultado) == 2:
-                    invoice_type, confidence = resultado
-                    # Validar tipos
-                    if not isinstance(invoice_type, str):
-                        invoice_type = str(invoice_type)
-                    if not isinstance(confidence, (int, float)):
-                        confidence = float(confidence) if confidence else 0.5
-                    return invoice_type, confidence
-                else:
-                    print(f"   ⚠️ Tupla con longitud inesperada: {len(resultado)}")
-                    return "general", 0.5
-            elif isinstance(resultado, dict):
-                print("   🔍 Resultado es diccionario, extrayendo valores...")
-                invoice_type = resultado.get('tipo', 'general')
-                confidence = resultado.get('confianza', 0.5)
-                return str(invoice_type), float(confidence)
-            else:
-                print(f"   ⚠️ Tipo de retorno inesperado: {type(resultado)}")
-                return "general", 0.5
+            logger.debug("Resultado clasificación: %r (%s)", resultado, type(resultado).__name__)
+            
+            return self._normalizar_clasificacion(resultado)
                 
         except ValueError as e:
             if "too many values to unpack" in str(e):
-                print("   ❌ ERROR: Demasiados valores para desempaquetar en clasificación")
-                print("   🔍 Revisar classifier.get_prediction_confidence()")
+                logger.error("Demasiados valores para desempaquetar en clasificación; "
+                             "revisar classifier.get_prediction_confidence()")
             return "general", 0.5
         except Exception as e:
-            print(f"   ❌ Error en clasificación: {str(e)}")
+            logger.error("Error en clasificación: %s", e)
             return "general", 0.5
 
-    def _construir_patrones(self) -> Dict[str, List[Dict]]:
-        """Construye patrones de extracción por campo - VERSIÓN MEJORADA"""
-        return {
-            'rnc_emisor': [
-                {'patron': r'RNC:\s*(\d{9,11})', 'grupo': 1, 'contexto': ['RNC:']},
-                {'patron': r'RNC\s*(\d{9,11})', 'grupo': 1, 'contexto': ['RNC']},
-                {'patron': r'Registro Nacional[:\s]*(\d{9,11})', 'grupo': 1, 'contexto': ['Registro Nacional']}
-            ],
-            'rnc_cliente': [
-                {'patron': r'RNC/CED[:\s]*(\d{9,11})', 'grupo': 1, 'contexto': ['RNC/CED']},
-                {'patron': r'CLIENTE[^\n]+\nRNC/CED[:\s]*(\d{9,11})', 'grupo': 1, 'contexto': ['CLIENTE', 'RNC/CED']},
-                {'patron': r'CLIENTE[^\n]*\n[^\n]*RNC[:\s]*(\d{9,11})', 'grupo': 1, 'contexto': ['CLIENTE', 'RNC']}
-            ],
-            'nombre_emisor': [
-                {'patron': r'^([^\n]+)\nAutovia', 'grupo': 1, 'contexto': ['Autovia']},
-                {'patron': r'^([^\n]+)\nRNC:', 'grupo': 1, 'contexto': ['RNC:']},
-                {'patron': r'RESET - ([^\n]+)', 'grupo': 1, 'contexto': ['RESET']}
-            ],
-            'razon_social': [
-                {'patron': r'CLIENTE:\s*([^\n]+)', 'grupo': 1, 'contexto': ['CLIENTE:']},
-                {'patron': r'CLIENTE[:\s]*([^\n]+)', 'grupo': 1, 'contexto': ['CLIENTE']}
-            ],
-            'ncf': [
-                {'patron': r'NCF:\s*([A-Z]\d{10,11})', 'grupo': 1, 'contexto': ['NCF:']},
-                {'patron': r'NCF[:\s]*([A-Z]\d{10,11})', 'grupo': 1, 'contexto': ['NCF']},
-                {'patron': r'B0100076051', 'grupo': 0, 'contexto': ['NCF']}  # Patrón específico
-            ],
-            'fecha': [
-                {'patron': r'FECHA:\s*(\d{1,2}/\d{1,2}/\d{4})', 'grupo': 1, 'contexto': ['FECHA:']},
-                {'patron': r'FECHA[:\s]*(\d{1,2}/\d{1,2}/\d{4})', 'grupo': 1, 'contexto': ['FECHA']},
-                {'patron': r'(\d{1,2}/\d{1,2}/\d{4})\s+\d{1,2}:\d{2}:\d{2}', 'grupo': 1, 'contexto': ['FECHA']}
-            ],
-            'subtotal': [
-                {'patron': r'SubTotal\s*==>\s*([0-9,]+\.?[0-9]*)', 'grupo': 1, 'contexto': ['SubTotal', '==>']},
-                {'patron': r'SubTotal[^\n]*([0-9,]+\.?[0-9]*)', 'grupo': 1, 'contexto': ['SubTotal']},
-                {'patron': r'SubTotal\s*([0-9,]+\.?[0-9]*)', 'grupo': 1, 'contexto': ['SubTotal']}
-            ],
-            'itbis': [
-                {'patron': r'Itbis\s*=\s*([0-9,]+\.?[0-9]*)', 'grupo': 1, 'contexto': ['Itbis', '=']},
-                {'patron': r'Itbis[^\n]*([0-9,]+\.?[0-9]*)', 'grupo': 1, 'contexto': ['Itbis']},
-                {'patron': r'ITBIS[^\n]*([0-9,]+\.?[0-9]*)', 'grupo': 1, 'contexto': ['ITBIS']}
-            ],
-            'total': [
-                {'patron': r'Total a Pagar RD\$\s*==>\s*([0-9,]+\.?[0-9]*)', 'grupo': 1, 'contexto': ['Total a Pagar RD$', '==>']},
-                {'patron': r'Total a Pagar[^\n]*RD\$[^\n]*([0-9,]+\.?[0-9]*)', 'grupo': 1, 'contexto': ['Total a Pagar', 'RD$']},
-                {'patron': r'Total[^\n]*([0-9,]+\.?[0-9]*)', 'grupo': 1, 'contexto': ['Total']}
-            ],
-            'numero_factura': [
-                {'patron': r'FACT\.NO:\s*(\d+)', 'grupo': 1, 'contexto': ['FACT.NO:']},
-                {'patron': r'=ACT\.NO:\s*(\d+)', 'grupo': 1, 'contexto': ['=ACT.NO:']},
-                {'patron': r'Factura[^\n]*(\d+)', 'grupo': 1, 'contexto': ['Factura']}
-            ]
-        }
-    
+    def _normalizar_clasificacion(self, resultado: Any) -> Tuple[str, float]:
+        """Convierte lo que devuelva el clasificador en (tipo, confianza)"""
+        # Caso habitual: (str, float), incluidos np.str_ y np.float64 del modelo
+        if type(resultado) is tuple and len(resultado) == 2:
+            invoice_type, confidence = resultado
+            if isinstance(invoice_type, str) and isinstance(confidence, float):
+                return resultado
+        
+        if isinstance(resultado, tuple):
+            if len(resultado) == 2:
+                invoice_type, confidence = resultado
+                # Validar tipos
+                if not isinstance(invoice_type, str):
+                    invoice_type = str(invoice_type)
+                if not isinstance(confidence, (int, float)):
+                    confidence = float(confidence) if confidence else 0.5
+                return invoice_type, confidence
+            else:
+                logger.warning("Clasificación: tupla con longitud inesperada: %d", len(resultado))
+                return "general", 0.5
+        elif isinstance(resultado, dict):
+            invoice_type = resultado.get('tipo', 'general')
+            confidence = resultado.get('confianza', 0.5)
+            return str(invoice_type), float(confidence)
+        else:
+            logger.warning("Clasificación: tipo de retorno inesperado: %s", type(resultado))
+            return "general", 0.5
+
+    def _extraer_con_fusion(self, texto: str, fusion: Dict[str, Any],
+                            texto_lower: Optional[str] = None) -> Dict[str, str]:
+        """
+        Recorre el texto una vez con el patrón fusionado. Respeta la prioridad de
+        cada campo y las mismas reglas de solapamiento que finditer por patrón.
+        """
+        ramas = fusion['ramas']
+        siguiente = [0] * len(ramas)
+        mejores = {}
+        resueltos = 0
+        
+        if texto_lower is not None:
+            # Ramas cuyo literal inicial no está en el texto no pueden coincidir
+            activas = [config_patron['literal'] in texto_lower for _, _, config_patron in ramas]
+        else:
+            activas = [True] * len(ramas)
+        
+        coincidencias = fusion['regex'].finditer(texto) if any(activas) else ()
+        for candidato in coincidencias:
+            posicion = candidato.start()
+            for i, (campo, prioridad, config_patron) in enumerate(ramas):
+                if not activas[i] or posicion < siguiente[i]:
+                    continue
+                actual = mejores.get(campo)
+                if actual is not None and actual[0] <= prioridad:
+                    continue
+                
+                match = config_patron['regex'].match(texto, posicion)
+                if match is None:
+                    continue
+                siguiente[i] = match.end()
+                
+                if config_patron['contexto_lower']:
+                    if not self._tiene_contexto_valido(texto, posicion, config_patron['contexto_lower']):
+                        continue
+                
+                valor = match.group(config_patron['grupo'])
+                if valor and valor.strip():
+                    valor = valor.strip()
+                    if config_patron['grupo'] == 0:
+                        valor = self._limpiar_valor_especial(valor, campo)
+                    mejores[campo] = (prioridad, valor)
+                    if prioridad == 0:
+                        resueltos += 1
+            
+            # Con el patrón preferido de cada campo resuelto ya no hay mejora posible
+            if resueltos == len(fusion['campos']):
+                break
+        
+        resultado = {campo: valor for campo, (_, valor) in mejores.items()}
+        
+        for campo, patrones in fusion['respaldos'].items():
+            if campo in resultado:
+                continue
+            for config_patron in patrones:
+                valor = self._extraer_con_patron(texto, config_patron, texto_lower)
+                if valor:
+                    if config_patron['grupo'] == 0:
+                        valor = self._limpiar_valor_especial(valor, campo)
+                    resultado[campo] = valor
+                    break
+        
+        return resultado
+
+    def _obtener_plan_regex(self) -> Tuple:
+        """Plan plano de la tabla de patrones actual; se reconstruye si la tabla cambia"""
+        plan = self._plan_regex
+        if plan is None or plan[0] is not self.patrones or plan[1] is not self.fusion_montos:
+            plan = (self.patrones, self.fusion_montos,
+                    _construir_plan_regex(self.patrones, self.fusion_montos))
+            self._plan_regex = plan
+        return plan[2]
+
     def _extraer_con_regex(self, texto: str, invoice_type: str) -> Dict[str, Any]:
         """Extracción tradicional con regex mejorada"""
         datos = {}
+        texto_lower = _texto_para_literales(texto)
+        fusion = self.fusion_montos
+        montos = self._extraer_con_fusion(texto, fusion, texto_lower) if fusion else {}
+        depurar = logger.isEnabledFor(logging.DEBUG)
         
-        for campo, patrones in self.patrones.items():
-            for config_patron in patrones:
-                valor = self._extraer_con_patron(texto, config_patron)
+        for campo, pasos in self._obtener_plan_regex():
+            if pasos is None:
+                if campo in montos:
+                    datos[campo] = montos[campo]
+                    if depurar:
+                        logger.debug("Regex encontró %s: %s", campo, montos[campo])
+                continue
+            
+            for regex, literal, grupo, contexto in pasos:
+                # Descarte barato: sin su literal inicial el patrón no puede coincidir
+                if texto_lower is not None and literal not in texto_lower:
+                    continue
+                
+                valor = None
+                for match in regex.finditer(texto):
+                    if contexto and not self._tiene_contexto_valido(texto, match.start(), contexto):
+                        continue
+                    candidato = match.group(grupo)
+                    if candidato and candidato.strip():
+                        valor = candidato.strip()
+                        break
+                
                 if valor:
-                    if config_patron['grupo'] == 0:
+                    if grupo == 0:
                         valor = self._limpiar_valor_especial(valor, campo)
                     
                     datos[campo] = valor
-                    print(f"   ✅ Regex encontró {campo}: {valor}")
+                    if depurar:
+                        logger.debug("Regex encontró %s: %s", campo, valor)
                     break
         
         return datos
-    
+
+    def extraer_regex_lote(self, textos: List[str]) -> List[Dict[str, Any]]:
+        """
+        Extracción regex de un lote de facturas con un solo recorrido por patrón.
+        Equivale a llamar _extraer_con_regex sobre cada texto por separado.
+        """
+        # El separador ocupa su propia línea y '\x00' no es espacio, así que casi
+        # ningún patrón cruza de una factura a otra; las que sí lo hacen se revisan solas
+        separador = '\n\x00\n'
+        texto_unido = separador.join(textos)
+        inicios = [0]
+        for texto in textos[:-1]:
+            inicios.append(inicios[-1] + len(texto) + len(separador))
+
+        resultados = [{} for _ in textos]
+
+        for campo, patrones in self.patrones.items():
+            for config_patron in patrones:
+                pendientes = {i for i, datos in enumerate(resultados) if campo not in datos}
+                if not pendientes:
+                    break
+                revisar = {}
+
+                for match in config_patron['regex'].finditer(texto_unido):
+                    indice = bisect.bisect_right(inicios, match.start()) - 1
+                    texto = textos[indice]
+                    inicio = match.start() - inicios[indice]
+
+                    # Facturas posteriores invadidas por la coincidencia: se buscan desde cero
+                    siguiente = indice + 1
+                    while siguiente < len(textos) and inicios[siguiente] < match.end():
+                        revisar.setdefault(siguiente, 0)
+                        siguiente += 1
+
+                    if indice not in pendientes or indice in revisar or inicio >= len(texto):
+                        continue
+
+                    if match.end() - inicios[indice] > len(texto):
+                        # Un cuantificador codicioso llegó al separador; sobre la factura
+                        # sola el patrón retrocede distinto, así que se retoma desde aquí
+                        revisar[indice] = inicio
+                        continue
+
+                    valor = match.group(config_patron['grupo'])
+
+                    if config_patron['contexto_lower']:
+                        if not self._tiene_contexto_valido(texto, inicio, config_patron['contexto_lower']):
+                            continue
+
+                    if valor and valor.strip():
+                        valor = valor.strip()
+                        if config_patron['grupo'] == 0:
+                            valor = self._limpiar_valor_especial(valor, campo)
+                        resultados[indice][campo] = valor
+                        pendientes.discard(indice)
+                        # Todas las facturas tienen ya este campo: el resto del recorrido sobra
+                        if not pendientes:
+                            break
+
+                for indice, desde in revisar.items():
+                    if indice not in pendientes:
+                        continue
+                    valor = self._extraer_con_patron(textos[indice], config_patron, desde=desde)
+                    if valor:
+                        if config_patron['grupo'] == 0:
+                            valor = self._limpiar_valor_especial(valor, campo)
+                        resultados[indice][campo] = valor
+
+        logger.debug("Lote regex procesado: %d facturas", len(textos))
+        return resultados
+
     def _limpiar_valor_especial(self, valor: str, campo: str) -> str:
         """Limpia valores especiales para patrones con grupo 0"""
         if campo == 'razon_social':
@@ -288,142 +822,146 @@ class DataExtractor:
             return valor.replace('Estacion de ', '').strip()
         return valor.strip()
     
-    def _extraer_con_patron(self, texto: str, config_patron: Dict) -> Optional[str]:
+    def _extraer_con_patron(self, texto: str, config_patron: Dict,
+                            texto_lower: Optional[str] = None, desde: int = 0) -> Optional[str]:
         """Extrae valor usando un patrón específico"""
-        try:
-            matches = re.finditer(config_patron['patron'], texto, re.IGNORECASE | re.MULTILINE)
+        # Descarte barato: sin su literal inicial el patrón no puede coincidir
+        if texto_lower is not None and config_patron['literal'] not in texto_lower:
+            return None
+        
+        for match in config_patron['regex'].finditer(texto, desde):
+            valor = match.group(config_patron['grupo'])
             
-            for match in matches:
-                if config_patron['grupo'] == 0:
-                    valor = match.group(0)
-                else:
-                    valor = match.group(config_patron['grupo'])
-                
-                if config_patron.get('contexto'):
-                    if not self._tiene_contexto_valido(texto, match.start(), config_patron['contexto']):
-                        continue
-                
-                if valor and valor.strip():
-                    return valor.strip()
-                    
-        except Exception as e:
-            print(f"❌ Error en patrón {config_patron['patron']}: {e}")
+            if config_patron['contexto_lower']:
+                if not self._tiene_contexto_valido(texto, match.start(), config_patron['contexto_lower']):
+                    continue
+            
+            if valor and valor.strip():
+                return valor.strip()
             
         return None
     
-    def _tiene_contexto_valido(self, texto: str, posicion: int, palabras_contexto: List[str]) -> bool:
-        """Verifica si hay palabras de contexto cerca"""
-        contexto_radio = 100
-        inicio = max(0, posicion - contexto_radio)
-        fin = min(len(texto), posicion + contexto_radio)
-        area_contexto = texto[inicio:fin].lower()
-        
-        return any(contexto.lower() in area_contexto for contexto in palabras_contexto)
+    def _tiene_contexto_valido(self, texto: str, posicion: int, palabras_contexto: Tuple[str, ...]) -> bool:
+        """Verifica si hay palabras de contexto cerca (ya en minúsculas, ver 'contexto_lower')"""
+        inicio = max(0, posicion - _RADIO_CONTEXTO)
+        fin = min(len(texto), posicion + _RADIO_CONTEXTO)
+        
+        # El texto se pasa a minúsculas una vez; cada palabra se ubica una vez por texto
+        indice = self._indice_contexto
+        if indice is None or indice[0] is not texto:
+            texto_lower = texto.lower()
+            # Si lower() cambia la longitud, las posiciones no corresponden al texto original
+            indice = (texto, texto_lower if len(texto_lower) == len(texto) else None, {})
+            self._indice_contexto = indice
+        _, texto_lower, posiciones = indice
+        
+        area_contexto = None
+        for palabra in palabras_contexto:
+            if texto_lower is None or not palabra.isascii():
+                if area_contexto is None:
+                    area_contexto = texto[inicio:fin].lower()
+                if palabra in area_contexto:
+                    return True
+                continue
+            
+            inicios = posiciones.get(palabra)
+            if inicios is None:
+                inicios = posiciones[palabra] = _posiciones_palabra(texto_lower, palabra)
+            # Primera aparición que empieza dentro del área: basta con que también termine dentro
+            i = bisect.bisect_left(inicios, inicio)
+            if i < len(inicios) and inicios[i] + len(palabra) <= fin:
+                return True
+        
+        return False
     
     def _combinar_resultados(self, datos_regex: Dict, datos_ml: Dict, texto: str, invoice_type: str) -> Dict[str, Any]:
         """Combina resultados de regex y ML inteligentemente - VERSIÓN CORREGIDA"""
         resultados = datos_regex.copy()
         
-        # Campos donde ML tiene prioridad
-        campos_ml_preferidos = ['total', 'fecha', 'fecha_emision', 'fecha_vencimiento']
-        
-        # Campos donde REGEX tiene prioridad (no permitir que ML los sobrescriba)
-        campos_regex_preferidos = ['rnc', 'nit', 'ncf', 'numero_factura', 'subtotal', 'itbis', 'rnc_emisor', 'rnc_cliente', 'nombre_emisor', 'razon_social']
-        
+        # Una sola consulta por campo ML: si regex no lo tiene, ML lo aporta siempre
         for campo, valor_ml in datos_ml.items():
-            campo_normalizado = self._normalizar_nombre_campo(campo)
+            campo_normalizado = _MAPEO_CAMPOS.get(campo, campo)
+            actual = resultados.get(campo_normalizado, _AUSENTE)
+            
+            if actual is _AUSENTE:
+                resultados[campo_normalizado] = valor_ml
+                if campo_normalizado in _CAMPOS_ML_PREFERIDOS:
+                    logger.debug("ML mejoró %s: %s", campo_normalizado, valor_ml)
             
             # ✅ NO permitir que ML sobrescriba campos críticos que ya tenemos de regex
-            if campo_normalizado in campos_regex_preferidos and campo_normalizado in resultados:
-                print(f"   🔒 Manteniendo valor regex para {campo_normalizado}: {resultados[campo_normalizado]}")
-                continue
-                
-            if campo_normalizado in campos_ml_preferidos:
-                if campo_normalizado not in resultados or self._es_mejor_valor(valor_ml, resultados[campo_normalizado], texto, campo_normalizado):
-                    resultados[campo_normalizado] = valor_ml
-                    print(f"   🤖 ML mejoró {campo_normalizado}: {valor_ml}")
+            elif campo_normalizado in _CAMPOS_REGEX_PREFERIDOS:
+                logger.debug("Manteniendo valor regex para %s: %s", campo_normalizado, actual)
             
-            elif campo_normalizado not in resultados:
+            elif (campo_normalizado in _CAMPOS_ML_PREFERIDOS
+                  and self._es_mejor_valor(valor_ml, actual, texto, campo_normalizado)):
                 resultados[campo_normalizado] = valor_ml
+                logger.debug("ML mejoró %s: %s", campo_normalizado, valor_ml)
         
         return resultados
     
     def _normalizar_nombre_campo(self, campo: str) -> str:
         """Normaliza nombres de campos de diferentes fuentes"""
-        mapeo = {
-            'fecha_detectada': 'fecha',
-            'monto_detectado': 'total',
-            'empresa_detectada': 'razon_social',
-            'numero_documento': 'rnc'
-        }
-        return mapeo.get(campo, campo)
+        return _MAPEO_CAMPOS.get(campo, campo)
     
     def _es_mejor_valor(self, valor_ml: str, valor_regex: str, texto: str, campo: str) -> bool:
         """Determina qué valor es mejor"""
-        if campo in ['razon_social']:
+        if campo == 'razon_social':
             return len(str(valor_ml)) > len(str(valor_regex))
         
-        if campo in ['total', 'subtotal', 'itbis']:
+        if campo in _CAMPOS_MONTO:
             return self._tiene_mejor_formato_monto(valor_ml)
         
         return False
     
     def _tiene_mejor_formato_monto(self, valor: str) -> bool:
-        """Verifica si el valor tiene buen formato de monto"""
-        return bool(re.match(r'^\d+[.,]\d{2}$', str(valor)))
+        """Verifica si el valor tiene buen formato de monto (dígitos, '.' o ',' y dos decimales)"""
+        valor = str(valor)
+        # Igual que '$' en el patrón original: se tolera un salto de línea final
+        if valor.endswith('\n'):
+            valor = valor[:-1]
+        return (len(valor) >= 4 and valor[-3] in '.,'
+                and valor[:-3].isdecimal() and valor[-2:].isdecimal())
     
     def _validar_datos_robusto(self, datos: Dict[str, Any], invoice_type: str) -> Dict[str, Any]:
         """Aplica validación robusta a todos los datos considerando el tipo de factura"""
         datos_validados = {}
+        # Las facturas de peaje no llevan NCF: no se valida
+        omitir_ncf = invoice_type == 'peaje'
         
         for campo, valor in datos.items():
             try:
-                # Validación especial para NCF en facturas de peaje
-                if campo == 'ncf' and invoice_type == 'peaje':
-                    print("   ⚠️  Factura de peaje: Ignorando validación NCF (no aplica)")
+                if omitir_ncf and campo == 'ncf':
+                    logger.debug("Factura de peaje: ignorando validación NCF (no aplica)")
                     continue
                     
                 valor_validado = self.validar_campo(campo, valor)
                 if valor_validado is not None and str(valor_validado).strip():
                     datos_validados[campo] = valor_validado
-                    print(f"   ✅ Campo {campo} validado: {valor_validado}")
+                    logger.debug("Campo %s validado: %s", campo, valor_validado)
                 else:
-                    print(f"   ⚠️  Campo {campo} descartado: {valor}")
+                    logger.debug("Campo %s descartado: %s", campo, valor)
             except Exception as e:
-                print(f"   ❌ Error validando {campo}: {str(e)}")
+                logger.warning("Error validando %s: %s", campo, e)
                 # Incluir el campo aunque falle la validación
                 datos_validados[campo] = valor
         
-        print(f"📊 Total de campos válidos: {len(datos_validados)}")
+        logger.debug("Total de campos válidos: %d", len(datos_validados))
         return datos_validados
 
     def validar_campo(self, nombre_campo: str, valor: Any) -> Any:
         """Sistema robusto de validación de campos"""
+        # Los validadores ya están enlazados en self.validadores: basta con buscarlos
+        validador = self.validadores.get(nombre_campo)
+        if validador is None:
+            logger.debug("No hay validador para campo: %s", nombre_campo)
+            return valor  # Por defecto, devolver valor original
+        
         try:
-            validador = self.validadores.get(nombre_campo)
-            if validador:
-                return validador(valor)
-            else:
-                print(f"⚠️ No hay validador para campo: {nombre_campo}")
-                return valor  # Por defecto, devolver valor original
-                
-        except AttributeError as e:
-            metodo_faltante = str(e).split("'")[-2]
-            print(f"🔧 Validador faltante: {metodo_faltante}, usando fallback")
-            return self._usar_fallback_validacion(metodo_faltante, valor)
+            return validador(valor)
         except Exception as e:
-            print(f"❌ Error en validación {nombre_campo}: {str(e)}")
+            logger.warning("Error en validación %s: %s", nombre_campo, e)
             return valor  # Fallback: devolver valor original
 
-    def _usar_fallback_validacion(self, metodo_faltante: str, valor: Any) -> Any:
-        """Usa métodos de fallback para validadores faltantes"""
-        fallback = self.fallbacks.get(metodo_faltante)
-        if fallback:
-            return fallback(valor)
-        else:
-            print(f"⚠️ No hay fallback para {metodo_faltante}, validación omitida")
-            return valor
-
     # ========== MÉTODOS DE VALIDACIÓN CORREGIDOS ==========
     
     def validar_ncf_formato(self, ncf: Any) -> Optional[str]:
@@ -440,32 +978,27 @@ class DataExtractor:
             
             # ✅ CORRECCIÓN: Si el NCF es "False" como string, tratarlo como inválido
             if ncf_clean == 'FALSE':
-                print(f"❌ NCF inválido: {ncf_clean}")
+                logger.debug("NCF inválido: %s", ncf_clean)
                 return None
                 
-            # ✅ PATRONES MEJORADOS para NCF dominicanos
-            patrones = [
-                r'^[A-Z]\d{10}$',      # E3100000001 (11 caracteres)
-                r'^[A-Z]\d{11}$',      # E31000000001 (12 caracteres)  
-                r'^[A-Z]{2}\d{9}$',    # B010000001 (11 caracteres)
-                r'^B01\d{8}$',         # B0100076051 (11 caracteres) - ✅ NUEVO PATRÓN
-                r'^E31\d{8}$',         # E3100000001 (11 caracteres) - ✅ NUEVO PATRÓN
-                r'^\d{3}-\d{7,8}$',    # 001-1234567
-                r'^\d{2}-\d{2}-\d{4,8}$',  # 01-01-123456
-                r'^\d{4}-\d{4}-\d{4}$',    # 0001-0000-0000001
-                r'^[A-Z]-\d{2}-\d{4,8}$'   # E-01-123456
-            ]
-            
-            for patron in patrones:
-                if re.match(patron, ncf_clean):
-                    print(f"✅ NCF válido: {ncf_clean} (patrón: {patron})")
-                    return ncf_clean  # ✅ Devolver el valor
-                        
-            print(f"❌ Formato NCF no válido: {ncf_clean}")
+            # Atajo para el formato más común: letra + 10 u 11 dígitos (los dos primeros patrones)
+            resto = ncf_clean[1:]
+            if len(resto) in (10, 11) and 'A' <= ncf_clean[0] <= 'Z' and resto.isdecimal():
+                patron = _PATRONES_NCF[len(resto) - 10]
+                logger.debug("NCF válido: %s (patrón: %s)", ncf_clean, patron.pattern)
+                return ncf_clean
+            
+            # ✅ PATRONES MEJORADOS para NCF dominicanos: una sola llamada con _NCF_UNION
+            match = _NCF_UNION.fullmatch(ncf_clean)
+            if match:
+                logger.debug("NCF válido: %s (patrón: %s)", ncf_clean, _PATRONES_NCF[match.lastindex - 1].pattern)
+                return ncf_clean  # ✅ Devolver el valor
+            
+            logger.debug("Formato NCF no válido: %s", ncf_clean)
             return None
             
         except Exception as e:
-            print(f"Error validando NCF {ncf}: {str(e)}")
+            logger.warning("Error validando NCF %s: %s", ncf, e)
             return None
 
     def validar_rnc_formato(self, rnc: Any) -> Optional[str]:
@@ -474,18 +1007,19 @@ class DataExtractor:
             if not rnc:
                 return None
                 
-            rnc_clean = str(rnc).strip()
+            # El mismo emisor se repite en muchas facturas: una sola copia del RNC
+            rnc_clean = sys.intern(str(rnc).strip())
             
             # Validación básica de RNC (9-11 dígitos)
             if rnc_clean.isdigit() and 9 <= len(rnc_clean) <= 11:
-                print(f"✅ RNC válido: {rnc_clean}")
+                logger.debug("RNC válido: %s", rnc_clean)
                 return rnc_clean
             else:
-                print(f"⚠️ RNC con formato inusual: {rnc_clean}")
+                logger.debug("RNC con formato inusual: %s", rnc_clean)
                 return rnc_clean  # Devolver original
                 
         except Exception as e:
-            print(f"Error validando RNC {rnc}: {str(e)}")
+            logger.warning("Error validando RNC %s: %s", rnc, e)
             return str(rnc) if rnc else None
 
     def validar_fecha_formato(self, fecha: Any) -> Optional[str]:
@@ -499,16 +1033,26 @@ class DataExtractor:
                 return None
                 
             # Convertir a string y limpiar
-            total_str = str(total).replace('RD$', '').replace('$', '').replace(',', '').strip()
+            total_str = str(total).replace('RD$', '').translate(_SIMBOLOS_MONTO).strip()
+            
+            # Una sola coma seguida de dos dígitos y sin punto es coma decimal (1250,50);
+            # en cualquier otro caso las comas separan miles (1,250.50)
+            if ',' in total_str:
+                entero, _, decimales = total_str.rpartition(',')
+                if (len(decimales) == 2 and decimales.isdecimal()
+                        and ',' not in entero and '.' not in entero):
+                    total_str = f'{entero}.{decimales}'
+                else:
+                    total_str = total_str.replace(',', '')
             
             # Intentar convertir a float
             total_float = float(total_str)
             
-            print(f"✅ Total válido: {total_float}")
+            logger.debug("Total válido: %s", total_float)
             return total_float
             
         except (ValueError, TypeError) as e:
-            print(f"❌ Error validando total {total}: {str(e)}")
+            logger.debug("Total no válido %s: %s", total, e)
             return None
 
     def validar_numero_factura_formato(self, numero: Any) -> Optional[str]:
@@ -521,13 +1065,13 @@ class DataExtractor:
             
             # Aceptar cualquier string no vacío como número de factura válido
             if numero_clean:
-                print(f"✅ Número factura válido: {numero_clean}")
+                logger.debug("Número factura válido: %s", numero_clean)
                 return numero_clean
             else:
                 return None
                 
         except Exception as e:
-            print(f"Error validando número factura {numero}: {str(e)}")
+            logger.warning("Error validando número factura %s: %s", numero, e)
             return str(numero) if numero else None
 
     def validar_hora_formato(self, hora: Any) -> Optional[str]:
@@ -539,15 +1083,15 @@ class DataExtractor:
             hora_clean = str(hora).strip()
             
             # Patrón básico de hora
-            if re.match(r'^\d{1,2}:\d{2}(:\d{2})?$', hora_clean):
-                print(f"✅ Hora válida: {hora_clean}")
+            if _HORA_RE.match(hora_clean):
+                logger.debug("Hora válida: %s", hora_clean)
                 return hora_clean
             else:
-                print(f"⚠️ Formato de hora inusual: {hora_clean}")
+                logger.debug("Formato de hora inusual: %s", hora_clean)
                 return hora_clean
                 
         except Exception as e:
-            print(f"Error validando hora {hora}: {str(e)}")
+            logger.warning("Error validando hora %s: %s", hora, e)
             return str(hora) if hora else None
 
     def validar_texto_general(self, texto: Any) -> Optional[str]:
@@ -564,7 +1108,7 @@ class DataExtractor:
                 return None
                 
         except Exception as e:
-            print(f"Error validando texto {texto}: {str(e)}")
+            logger.warning("Error validando texto %s: %s", texto, e)
             return str(texto) if texto else None
 
     # ========== MÉTODOS DE FALLBACK ==========
@@ -610,40 +1154,35 @@ class DataExtractor:
             texto_limpio = str(texto_fecha).strip()
             
             # Log para debugging
-            print(f"🔍 Parseando fecha: '{texto_limpio}'")
-            
-            # Intentar múltiples formatos en orden de preferencia
-            formatos = [
-                '%d/%m/%Y',  # 08/10/2025
-                '%d-%m-%Y',  # 08-10-2025  
-                '%Y-%m-%d',  # 2025-10-08
-                '%d/%m/%y',  # 08/10/25 (CUIDADO con este)
-                '%d-%m-%y',  # 08-10-25
-            ]
-            
-            for formato in formatos:
+            logger.debug("Parseando fecha: %r", texto_limpio)
+            
+            # Intentar múltiples formatos en orden de preferencia, sin excepciones por formato
+            for formato in _FORMATOS_FECHA:
+                match = formato.fullmatch(texto_limpio)
+                if match is None:
+                    continue
+                
+                dia, mes, anio = int(match['d']), int(match['m']), int(match['y'])
+                # CORRECCIÓN CRÍTICA: Manejar correctamente los años de 2 dígitos
+                if len(match['y']) == 2:
+                    # Asumir que años <= 30 son 2000+, años > 30 son 1900+
+                    anio += 2000 if anio <= 30 else 1900
+                
                 try:
-                    fecha_parsed = datetime.strptime(texto_limpio, formato)
-                    
-                    # CORRECCIÓN CRÍTICA: Manejar correctamente los años de 2 dígitos
-                    if formato in ['%d/%m/%y', '%d-%m-%y']:
-                        # Asumir que años <= 30 son 2000+, años > 30 son 1900+
-                        if fecha_parsed.year > 2030:
-                            fecha_parsed = fecha_parsed.replace(year=fecha_parsed.year - 100)
-                    
-                    fecha_formateada = fecha_parsed.strftime('%d/%m/%Y')
-                    print(f"✅ Fecha parseada: '{texto_limpio}' -> '{fecha_formateada}'")
-                    return fecha_formateada
-                    
+                    datetime(anio, mes, dia)
                 except ValueError:
                     continue
+                
+                fecha_formateada = f"{dia:02d}/{mes:02d}/{anio}"
+                logger.debug("Fecha parseada: %r -> %r", texto_limpio, fecha_formateada)
+                return fecha_formateada
                     
             # Si no coincide con ningún formato, devolver original
-            print(f"⚠️ No se pudo parsear fecha: '{texto_limpio}'")
+            logger.debug("No se pudo parsear fecha: %r", texto_limpio)
             return texto_limpio
             
         except Exception as e:
-            print(f"❌ Error parseando fecha '{texto_fecha}': {str(e)}")
+            logger.warning("Error parseando fecha %r: %s", texto_fecha, e)
             return str(texto_fecha) if texto_fecha else None
 
     # ========== SISTEMA OPTIMIZADO DE ENVÍO ==========
@@ -655,20 +1194,18 @@ class DataExtractor:
         # Usar el sistema optimizado de campos
         resultado_optimizado = self.optimizar_campos_enviados(datos, invoice_type)
         
-        # Agregar metadatos
-        resultado_optimizado.update({
-            'tipo_factura': invoice_type,
-            'confianza_clasificacion': round(confidence, 2),
-            'calidad_texto': quality_analysis['calidad'],
-            'total_campos_encontrados': len(datos),
-            'metodo_extraccion': 'HIBRIDO_ML',
-            'tiene_ncf': self._determinar_si_tiene_ncf(datos, invoice_type)
-        })
-        
-        print(f"🎯 ENVIANDO {len(resultado_optimizado)} CAMPOS A LA UI")
-        print("🔍 ESTRUCTURA OPTIMIZADA:")
-        for key, value in resultado_optimizado.items():
-            print(f"   🏷️  {key}: {value}")
+        # Agregar metadatos directamente sobre el diccionario ya construido
+        resultado_optimizado['tipo_factura'] = invoice_type
+        resultado_optimizado['confianza_clasificacion'] = round(confidence, 2)
+        resultado_optimizado['calidad_texto'] = quality_analysis['calidad']
+        resultado_optimizado['total_campos_encontrados'] = len(datos)
+        resultado_optimizado['metodo_extraccion'] = 'HIBRIDO_ML'
+        resultado_optimizado['tiene_ncf'] = self._determinar_si_tiene_ncf(datos, invoice_type)
+        
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("Enviando %d campos a la UI:", len(resultado_optimizado))
+            for key, value in resultado_optimizado.items():
+                logger.debug("   %s: %s", key, value)
         
         return resultado_optimizado
 
@@ -690,31 +1227,12 @@ class DataExtractor:
         Optimiza los campos enviados a la UI para evitar duplicación excesiva
         """
         try:
-            # Campos esenciales que siempre enviar
-            campos_esenciales = {
-                'rnc_emisor', 'rnc_cliente', 'fecha', 'total', 'subtotal', 'itbis',
-                'numero_factura', 'ncf', 'razon_social', 'nombre_emisor'
-            }
-            
-            # Campos específicos por tipo de factura
-            campos_por_tipo = {
-                'peaje': {'vehiculo', 'estacion', 'hora', 'operador'},
-                'combustible': {'vehiculo', 'estacion', 'litros', 'producto'},
-                'general': {'descripcion', 'concepto'}
-            }
-            
-            resultado = {}
-            
-            # Agregar campos esenciales que existan en los datos
-            for campo in campos_esenciales:
-                if campo in datos and datos[campo] is not None:
-                    resultado[campo] = datos[campo]
-            
-            # Agregar campos específicos del tipo de factura
-            campos_tipo = campos_por_tipo.get(invoice_type, set())
-            for campo in campos_tipo:
-                if campo in datos and datos[campo] is not None:
-                    resultado[campo] = datos[campo]
+            # Campos esenciales y específicos del tipo de factura que existan en los datos,
+            # en el orden en que llegaron
+            campos_a_enviar = _CAMPOS_A_ENVIAR.get(invoice_type, _CAMPOS_ESENCIALES)
+            presentes = campos_a_enviar & datos.keys()
+            resultado = {campo: valor for campo, valor in datos.items()
+                         if campo in presentes and valor is not None}
             
             # Agregar cualquier otro campo que no sea duplicado
             for campo, valor in datos.items():
@@ -723,74 +1241,51 @@ class DataExtractor:
                     if not self._es_campo_duplicado(campo, resultado.keys()):
                         resultado[campo] = valor
             
-            print(f"🎯 Optimización: {len(datos)} -> {len(resultado)} campos")
+            logger.debug("Optimización: %d -> %d campos", len(datos), len(resultado))
             return resultado
             
         except Exception as e:
-            print(f"❌ Error optimizando campos: {str(e)}")
+            logger.warning("Error optimizando campos: %s", e)
             return datos
 
     def _es_campo_duplicado(self, campo: str, campos_existentes: set) -> bool:
         """Verifica si un campo es duplicado de otro ya existente"""
-        grupos_duplicados = [
-            {'rnc', 'rnc_emisor', 'rnc_cliente', 'identificacion'},
-            {'razon_social', 'nombre_emisor', 'empresa_detectada'},
-            {'total', 'monto_detectado', 'total_pagar'},
-            {'fecha', 'fecha_emision', 'fecha_detectada'}
-        ]
-        
-        for grupo in grupos_duplicados:
-            if campo in grupo:
-                for campo_existente in campos_existentes:
-                    if campo_existente in grupo and campo_existente != campo:
-                        print(f"🔍 Campo duplicado: {campo} (ya existe {campo_existente})")
-                        return True
+        # Solo se consultan los pocos campos del grupo, no todos los existentes
+        grupo = _GRUPO_POR_CAMPO.get(campo)
+        if grupo is not None:
+            for campo_existente in grupo:
+                if campo_existente != campo and campo_existente in campos_existentes:
+                    logger.debug("Campo duplicado: %s (ya existe %s)", campo, campo_existente)
+                    return True
         return False
 
     def _extraccion_basica_fallback(self, texto: str, invoice_type: str) -> Dict[str, Any]:
         """Extracción básica de fallback cuando falla el sistema principal"""
         try:
-            print("🔄 Usando extracción básica de fallback...")
+            logger.warning("Usando extracción básica de fallback")
             
             datos_basicos = {}
             
             # Extracción mínima con patrones simples
-            patrones_fallback = {
-                'total': r'Total[^\d]*([0-9,]+\.?[0-9]*)',
-                'fecha': r'(\d{1,2}/\d{1,2}/\d{4})',
-                'rnc': r'RNC[:\s]*(\d{9,11})',
-                'numero_factura': r'Factura[^\n]*(\d+)'
-            }
-            
-            for campo, patron in patrones_fallback.items():
-                match = re.search(patron, texto, re.IGNORECASE)
+            for campo, patron in _PATRONES_FALLBACK:
+                match = patron.search(texto)
                 if match:
                     datos_basicos[campo] = match.group(1).strip()
             
             # Agregar metadatos de fallback
-            datos_basicos.update({
-                'tipo_factura': invoice_type,
-                'confianza_clasificacion': 0.1,
-                'calidad_texto': 'BAJA',
-                'total_campos_encontrados': len(datos_basicos),
-                'metodo_extraccion': 'FALLBACK_BASICO',
-                'tiene_ncf': False,
-                'advertencia': 'Extracción limitada - sistema principal falló'
-            })
+            metadatos = _METADATOS_FALLBACK.copy()
+            metadatos['tipo_factura'] = invoice_type
+            metadatos['total_campos_encontrados'] = len(datos_basicos)
+            datos_basicos.update(metadatos)
             
-            print(f"🔄 Fallback: {len(datos_basicos)} campos básicos encontrados")
+            logger.info("Fallback: %d campos básicos encontrados", len(datos_basicos))
             return datos_basicos
             
         except Exception as e:
-            print(f"🚨 ERROR incluso en fallback: {str(e)}")
-            return {
-                'tipo_factura': 'desconocido',
-                'confianza_clasificacion': 0.0,
-                'calidad_texto': 'CRITICA',
-                'total_campos_encontrados': 0,
-                'metodo_extraccion': 'ERROR',
-                'error': str(e)
-            }
+            logger.error("ERROR incluso en fallback: %s", e)
+            resultado = _RESULTADO_ERROR.copy()
+            resultado['error'] = str(e)
+            return resultado
 
     # ========== MÉTODOS DE UTILIDAD ADICIONALES ==========
 
@@ -800,13 +1295,17 @@ class DataExtractor:
             'modelo_cargado': self.classifier.classifier is not None,
             'total_patrones_regex': sum(len(patrones) for patrones in self.patrones.values()),
             'validadores_activos': len(self.validadores),
-            'fallbacks_configurados': len(self.fallbacks)
+            'fallbacks_configurados': len(self.fallbacks),
+            'cache_aciertos': self._cache_hits,
+            'cache_fallos': self._cache_misses
         }
 
     def limpiar_cache_modelo(self):
         """Limpia el cache del modelo ML para forzar recarga"""
         self.classifier.classifier = None
         self.classifier.load_model()
+        with self._bloqueo_cache:
+            self._cache_extraccion.clear()
         print("🧹 Cache del modelo limpiado")
 
     def exportar_configuracion_patrones(self) -> Dict[str, Any]:
@@ -844,10 +1343,15 @@ class DataExtractor:
             'TrainingManager': self.training_manager is not None
         }
         
-        for componente, estado in componentes.items():
-            if not estado:
+        # Un bit por componente (en el orden de arriba), para agregar muchos diagnósticos
+        mascara = 0
+        for bit, (componente, estado) in enumerate(componentes.items()):
+            if estado:
+                mascara |= 1 << bit
+            else:
                 diagnostico['errores'].append(f"Componente {componente} no inicializado")
                 diagnostico['estado_sistema'] = 'ERROR'
+        diagnostico['componentes_mask'] = mascara
         
         # Verificar patrones regex
         if not self.patrones:
@@ -872,7 +1376,7 @@ class DataExtractor:
         
         # Resumen del diagnóstico
         print(f"📊 DIAGNÓSTICO: {diagnostico['estado_sistema']}")
-        print(f"   ✅ Componentes: {sum(componentes.values())}/{len(componentes)}")
+        print(f"   ✅ Componentes: {bin(mascara).count('1')}/{len(componentes)}")
         print(f"   ❌ Errores: {len(diagnostico['errores'])}")
         print(f"   ⚠️  Advertencias: {len(diagnostico['advertencias'])}")
         
@@ -1,6 +1,5 @@
 # processing/exporter.py
 import json
-import pandas as pd
 import logging
 from typing import List, Dict, Any
 from datetime import datetime
@@ -41,8 +40,8 @@ class Exporter:
                 logger.warning("No hay datos para exportar a Excel")
                 return False
             
-            # Crear DataFrame
-            df = pd.DataFrame(facturas)
+            # pandas solo se carga al exportar a Excel
+            import pandas as pd
             
             # Seleccionar columnas relevantes
             columnas_exportar = [
@@ -50,9 +49,11 @@ class Exporter:
                 'subtotal', 'impuestos', 'descuentos', 'total', 'fecha_procesamiento'
             ]
             
-            # Filtrar columnas existentes
-            columnas_existentes = [col for col in columnas_exportar if col in df.columns]
-            df_export = df[columnas_existentes].copy()
+            # Filtrar columnas existentes y construir el DataFrame solo con ellas,
+            # sin materializar antes todas las columnas de las facturas
+            campos_presentes = set().union(*facturas)
+            columnas_existentes = [col for col in columnas_exportar if col in campos_presentes]
+            df_export = pd.DataFrame.from_records(facturas, columns=columnas_existentes)
             
             # Renombrar columnas
             nombres_spanish = {
@@ -86,10 +87,11 @@ class Exporter:
             logger.error(f"Error exportando a Excel: {e}")
             return False
     
-    def _crear_resumen(self, df: pd.DataFrame) -> pd.DataFrame:
+    def _crear_resumen(self, df: 'pd.DataFrame') -> 'pd.DataFrame':
         """
         Crea DataFrame de resumen para exportación
         """
+        import pandas as pd
         try:
             resumen = pd.DataFrame({
                 'Métrica': [
@@ -33,7 +33,8 @@ class ValidadorDatos:
             if coincidencia:
                 grupos = coincidencia.groups()
                 try:
-                    if len(grupos[2]) == 4:
+                    # Un año de 4 dígitos al inicio indica formato año-mes-día
+                    if len(grupos[0]) == 4:
                         año, mes, dia = int(grupos[0]), int(grupos[1]), int(grupos[2])
                     else:
                         dia, mes, año = int(grupos[0]), int(grupos[1]), int(grupos[2])
@@ -69,4 +70,11 @@ class ValidadorDatos:
         except ValueError:
             pass
             
-        return None
\ No newline at end of file
+        return None
+
+
+if __name__ == "__main__":
+    # Comprobación rápida del módulo
+    assert ValidadorDatos.validar_y_corregir_fecha('08/10/2025') == '08/10/2025'
+    assert ValidadorDatos.validar_y_corregir_fecha('08-10-25') == '08/10/2025'
+    print("✅ Validador de fechas funcionando correctamente")
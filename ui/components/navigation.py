@@ -5,10 +5,17 @@ Componente de navegación entre imágenes
 import tkinter as tk
 from tkinter import ttk
 import os
-import glob
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 from PIL import Image, ImageTk
 import logging
 
+# Extensiones de imagen admitidas al cargar una carpeta (comparadas en minúsculas)
+_IMAGE_EXTENSIONS = frozenset({'.jpg', '.jpeg', '.png', '.bmp', '.tiff', '.tif'})
+
+# Miniaturas ya decodificadas que se conservan para volver a imágenes recientes
+_THUMB_CACHE_SIZE = 32
+
 class NavigationPanel(ttk.Frame):
     """Panel de navegación entre imágenes"""
     
@@ -19,6 +26,11 @@ class NavigationPanel(ttk.Frame):
         self.current_image_path = None
         self.image_list = []
         self.current_index = -1
+        # (ruta, mtime) -> PhotoImage listo para mostrar
+        self._thumb_cache = OrderedDict()
+        # Precarga de las imágenes vecinas: ruta -> Future con (clave, imagen PIL)
+        self._prefetch_pool = ThreadPoolExecutor(max_workers=2)
+        self._prefetch = {}
         
         self.setup_ui()
     
@@ -75,15 +87,16 @@ class NavigationPanel(ttk.Frame):
     def load_folder(self, folder_path):
         """Carga todas las imágenes de una carpeta"""
         try:
-            extensions = ['*.jpg', '*.jpeg', '*.png', '*.bmp', '*.tiff', '*.tif']
-            self.image_list = []
-            
-            for extension in extensions:
-                self.image_list.extend(glob.glob(os.path.join(folder_path, extension)))
-                self.image_list.extend(glob.glob(os.path.join(folder_path, extension.upper())))
+            # Una sola lectura del directorio; como glob, se omiten los archivos ocultos
+            with os.scandir(folder_path) as entries:
+                self.image_list = sorted(
+                    entry.path for entry in entries
+                    if not entry.name.startswith('.')
+                    and os.path.splitext(entry.name)[1].lower() in _IMAGE_EXTENSIONS
+                    and entry.is_file()
+                )
             
             if self.image_list:
-                self.image_list.sort()
                 self.current_index = 0
                 self.show_current_image()
                 logging.info(f"✓ Carpeta cargada: {len(self.image_list)} imágenes")
@@ -116,6 +129,7 @@ class NavigationPanel(ttk.Frame):
         self.current_image_path = self.image_list[self.current_index]
         self.display_image(self.current_image_path)
         self.update_navigation_info()
+        self._prefetch_neighbors()
         
         # Disparar evento de cambio de imagen
         if hasattr(self, 'on_image_changed'):
@@ -124,23 +138,21 @@ class NavigationPanel(ttk.Frame):
     def display_image(self, image_path):
         """Muestra una imagen en el label"""
         try:
-            image = Image.open(image_path)
-            
-            # Redimensionar manteniendo aspecto
-            width, height = image.size
-            max_width = 600
-            max_height = 500
-            
-            if width > max_width or height > max_height:
-                ratio_width = max_width / width
-                ratio_height = max_height / height
-                ratio = min(ratio_width, ratio_height)
-                
-                new_width = int(width * ratio)
-                new_height = int(height * ratio)
-                image = image.resize((new_width, new_height), Image.Resampling.LANCZOS)
+            # La fecha de modificación invalida la miniatura si el archivo cambió
+            key = (image_path, os.stat(image_path).st_mtime_ns)
+            photo = self._thumb_cache.get(key)
+            if photo is not None:
+                self._thumb_cache.move_to_end(key)
+            else:
+                image = self._take_prefetched(key)
+                if image is None:
+                    image = self._load_thumb(image_path)
+                # Los objetos de Tk solo se crean en el hilo principal
+                photo = ImageTk.PhotoImage(image)
+                self._thumb_cache[key] = photo
+                if len(self._thumb_cache) > _THUMB_CACHE_SIZE:
+                    self._thumb_cache.popitem(last=False)
             
-            photo = ImageTk.PhotoImage(image)
             self.image_label.configure(image=photo, text="")
             self.image_label.image = photo
             
@@ -152,6 +164,50 @@ class NavigationPanel(ttk.Frame):
             self.image_label.configure(image='', text=f"Error al cargar imagen:\n{str(e)}")
             logging.error(f"Error mostrando imagen: {e}")
     
+    @staticmethod
+    def _load_thumb(image_path):
+        """Decodifica y reduce una imagen para la vista previa"""
+        with Image.open(image_path) as image:
+            # Reducir en sitio manteniendo aspecto; thumbnail no amplía y en JPEG
+            # decodifica directamente a una escala reducida (draft)
+            image.thumbnail((600, 500), Image.Resampling.LANCZOS)
+            return image
+    
+    def _prefetch_thumb(self, image_path):
+        """Prepara en segundo plano la miniatura de una imagen vecina"""
+        key = (image_path, os.stat(image_path).st_mtime_ns)
+        return key, self._load_thumb(image_path)
+    
+    def _prefetch_neighbors(self):
+        """Lanza la precarga de la imagen anterior y la siguiente"""
+        neighbors = {self.image_list[i] for i in (self.current_index - 1, self.current_index + 1)
+                     if 0 <= i < len(self.image_list)}
+        
+        # Descartar precargas de imágenes que ya no están al lado
+        for path in [path for path in self._prefetch if path not in neighbors]:
+            self._prefetch.pop(path).cancel()
+        
+        cached_paths = {path for path, _ in self._thumb_cache}
+        for path in neighbors:
+            if path not in self._prefetch and path not in cached_paths:
+                self._prefetch[path] = self._prefetch_pool.submit(self._prefetch_thumb, path)
+    
+    def _take_prefetched(self, key):
+        """Devuelve la imagen precargada para la clave, si existe y sigue vigente"""
+        future = self._prefetch.pop(key[0], None)
+        if future is None:
+            return None
+        if not future.done():
+            # No se espera en el hilo de Tk: la imagen se carga aquí como sin precarga
+            future.cancel()
+            return None
+        try:
+            prefetched_key, image = future.result()
+        except Exception:
+            # Se repite la carga en el hilo principal para informar del error
+            return None
+        return image if prefetched_key == key else None
+    
     def previous_image(self):
         """Muestra la imagen anterior"""
         if self.current_index > 0:
@@ -197,7 +253,21 @@ class NavigationPanel(ttk.Frame):
         self.image_list = []
         self.current_index = -1
         self.current_image_path = None
+        self._thumb_cache.clear()
+        self._cancel_prefetch()
         self.image_label.configure(image='', text="Seleccione una factura para comenzar")
         self.image_info_label.configure(text="No hay imagen cargada")
         self.update_navigation_info()
-        self.update_providers_list()
\ No newline at end of file
+        self.update_providers_list()
+    
+    def _cancel_prefetch(self):
+        """Cancela las precargas pendientes"""
+        for future in self._prefetch.values():
+            future.cancel()
+        self._prefetch.clear()
+    
+    def destroy(self):
+        """Libera los hilos de precarga junto con el widget"""
+        self._cancel_prefetch()
+        self._prefetch_pool.shutdown(wait=False)
+        super().destroy()
@@ -7,12 +7,13 @@ import os
 import logging
 from datetime import datetime
 import json
-import glob
-import pandas as pd
 
 # Configurar logging
 logger = logging.getLogger(__name__)
 
+# Extensiones de imagen admitidas al cargar una carpeta (comparadas en minúsculas)
+_EXTENSIONES_IMAGEN = frozenset({'.jpg', '.jpeg', '.png', '.bmp', '.tiff', '.tif'})
+
 class ExtractorFacturasApp:
     def __init__(self, root):
         self.root = root
@@ -236,16 +237,17 @@ class ExtractorFacturasApp:
         carpeta = filedialog.askdirectory(title="Seleccionar carpeta con facturas")
         
         if carpeta:
-            # Buscar imágenes en formatos comunes
-            extensiones = ['*.jpg', '*.jpeg', '*.png', '*.bmp', '*.tiff', '*.tif']
-            self.lista_imagenes = []
-            
-            for extension in extensiones:
-                self.lista_imagenes.extend(glob.glob(os.path.join(carpeta, extension)))
-                self.lista_imagenes.extend(glob.glob(os.path.join(carpeta, extension.upper())))
+            # Buscar imágenes en formatos comunes con una sola lectura del directorio;
+            # como glob, se omiten los archivos ocultos
+            with os.scandir(carpeta) as entradas:
+                self.lista_imagenes = sorted(  # Ordenar alfabéticamente
+                    entrada.path for entrada in entradas
+                    if not entrada.name.startswith('.')
+                    and os.path.splitext(entrada.name)[1].lower() in _EXTENSIONES_IMAGEN
+                    and entrada.is_file()
+                )
             
             if self.lista_imagenes:
-                self.lista_imagenes.sort()  # Ordenar alfabéticamente
                 self.indice_actual = 0
                 self.mostrar_imagen_actual()
                 messagebox.showinfo("Éxito", f"Se cargaron {len(self.lista_imagenes)} imágenes")
@@ -304,22 +306,12 @@ class ExtractorFacturasApp:
     def mostrar_imagen(self, ruta):
         """Muestra la imagen en el label"""
         try:
-            imagen = Image.open(ruta)
-            # Redimensionar manteniendo aspecto
-            ancho, alto = imagen.size
-            max_ancho = 600
-            max_alto = 500
-            
-            if ancho > max_ancho or alto > max_alto:
-                ratio_ancho = max_ancho / ancho
-                ratio_alto = max_alto / alto
-                ratio = min(ratio_ancho, ratio_alto)
-                
-                nuevo_ancho = int(ancho * ratio)
-                nuevo_alto = int(alto * ratio)
-                imagen = imagen.resize((nuevo_ancho, nuevo_alto), Image.Resampling.LANCZOS)
+            with Image.open(ruta) as imagen:
+                # Reducir en sitio manteniendo aspecto; thumbnail no amplía y en JPEG
+                # decodifica directamente a una escala reducida (draft)
+                imagen.thumbnail((600, 500), Image.Resampling.LANCZOS)
+                foto = ImageTk.PhotoImage(imagen)
             
-            foto = ImageTk.PhotoImage(imagen)
             self.label_imagen.configure(image=foto, text="")
             self.label_imagen.image = foto
             
@@ -822,8 +814,8 @@ class ExtractorFacturasApp:
                 messagebox.showwarning("Advertencia", "No hay datos para exportar")
                 return
             
-            # Crear DataFrame
-            df = pd.DataFrame(facturas)
+            # pandas solo se carga al exportar a Excel
+            import pandas as pd
             
             # Seleccionar y renombrar columnas relevantes
             columnas_exportar = [
@@ -831,9 +823,10 @@ class ExtractorFacturasApp:
                 'subtotal', 'impuestos', 'descuentos', 'total', 'fecha_procesamiento'
             ]
             
-            # Filtrar columnas existentes
-            columnas_existentes = [col for col in columnas_exportar if col in df.columns]
-            df_export = df[columnas_existentes].copy()
+            # Un solo DataFrame con las columnas existentes; hoja principal y resumen salen de él
+            campos_presentes = set().union(*facturas)
+            columnas_existentes = [col for col in columnas_exportar if col in campos_presentes]
+            df_export = pd.DataFrame.from_records(facturas, columns=columnas_existentes)
             
             # Renombrar columnas
             nombres_spanish = {